@@ -1,29 +1,107 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, session
-from werkzeug.utils import secure_filename
-
-from services.DogHealthAnalyzer import DogHealthAnalyzer
-from utils.settings import landmarks, device, model
+import uuid
+import json
+import hashlib
+from datetime import datetime
+from flask import Flask, Blueprint, render_template, request, redirect, url_for, send_from_directory, send_file, jsonify, abort
+from flask import Response, stream_with_context
+
+from services.JobQueue import JobQueue, JobQueueFull
+from services.AnalysisWorker import build_default_analyzer
+from services.ResultCache import ResultCache
+from services.GraphRenderer import GraphRenderer
+from services.BehaviorSegments import iter_frames, expand_runs
+from services.EmotionTrends import EmotionTrends
+from services.SimilarityIndex import SimilarityIndex
+from services.BehaviorFingerprint import FINGERPRINT_SIZE, TAIL_INTENSITY_BLOCK
+from database import DogHealthDB
+from utils.settings import analysis_workers, analysis_worker_mode, max_pending_jobs
+from utils.settings import result_cache_max_mb, result_cache_ttl_hours
+from utils.settings import render_graph_pngs, graph_render_workers
+from utils.settings import database_path, database_pool_size, database_busy_timeout
+from utils.settings import history_page_size, history_max_page_size
+from utils.settings import trend_windows_days, trend_change_threshold, trend_change_drift, trend_min_sessions
+from utils.settings import trend_max_points, similar_max_results
 
 # ===================== CONFIG =====================
-app = Flask(__name__)
-app.secret_key = "dogai_super_secret_key"
-
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
 
 RESULT_FOLDER = os.path.join(BASE_DIR, "results")
+RESULT_CACHE_FOLDER = os.path.join(RESULT_FOLDER, "cache")
 
 ALLOWED_EXTENSIONS = {"mp4", "avi", "mov"}
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(RESULT_FOLDER, exist_ok=True)
-
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config["RESULT_FOLDER"] = RESULT_FOLDER
-
-# ===================== AI ANALYZER =====================
-analyzer = DogHealthAnalyzer(model=model, landmarks=landmarks, device=device)
+routes = Blueprint("dogai", __name__)
+
+# ===================== SERVICES =====================
+# Built by create_app(), never at import time: spawned job queue and graph
+# render workers re-import the launching script, and must not load a model,
+# migrate the database or start pools of their own.
+analyzer = None
+result_cache = None
+graph_renderer = None
+db = None
+fingerprint_index = None
+job_queue = None
+
+
+# ===================== GRAPH EXPORTS =====================
+def graph_path(result):
+    return os.path.join(os.path.dirname(result["timeline"]), "timeline.png")
+
+
+def export_graphs(job_id, result):
+    graph_renderer.submit(result["timeline"], graph_path(result))
+
+
+# ===================== HISTORY =====================
+def profile_states(behavior_profile):
+    # "Tail: Wagging\nEars: ..." -> {"Tail": "Wagging", ...}
+    return dict(line.split(": ", 1) for line in behavior_profile.splitlines() if ": " in line)
+
+
+def save_history(job_id, result):
+    job = job_queue.get(job_id)
+    meta = job["meta"] if job else {}
+
+    with open(result["timeline"]) as f:
+        timeline = json.load(f)
+    last_timestamp = expand_runs(timeline["samples"]["timestamps"], timeline["count"] - 1)
+    report = result["emotional_report"]
+    states = profile_states(result["behavior_profile"])
+
+    video_id = db.save_video_analysis({
+        "dog_id": meta.get("dog_id"),
+        "video_hash": meta.get("video_hash"),
+        # Same clip, other analyzer / scoring: replaces the stored analysis
+        "analysis_key": analyzer.result_key(meta["video_hash"]) if meta.get("video_hash") else None,
+        "video_filename": meta.get("video_filename"),
+        "saved_video_path": meta.get("video_url"),
+        "upload_date": datetime.now().isoformat(timespec="seconds"),
+        "tail_summary": states.get("Tail"),
+        "ear_summary": states.get("Ears"),
+        "head_summary": states.get("Head"),
+        "posture_summary": states.get("Posture"),
+        "health_status": report.get("should_worry"),
+        "activity_status": f"{report['activity_percent']}% active" if report else None,
+        "recommendation": result["doctor_summary"],
+        "graphs_path": result_file(result["timeline"]),
+        "duration_seconds": float(last_timestamp[0]) if len(last_timestamp) else 0.0,
+        "mental_health_percent": report.get("mental_health_percent"),
+        "emotional_report": report,
+        "fingerprint": result.get("fingerprint"),
+        "timeline": timeline
+    })
+    if result.get("fingerprint") is not None:
+        fingerprint_index.add(video_id, result["fingerprint"])
+    print(f"🗄️ Saved job {job_id} as video {video_id} for dog {meta.get('dog_id')}")
+
+
+def on_job_finished(job_id, result):
+    save_history(job_id, result)
+    if render_graph_pngs:
+        export_graphs(job_id, result)
 
 
 # ===================== HELPERS =====================
@@ -31,82 +109,372 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def save_upload(file, upload_folder):
+    # Hash while streaming to disk; the saved name is the content hash, so
+    # identical uploads share one file and never clobber different videos.
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(upload_folder, f".upload-{uuid.uuid4().hex}")
+
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: file.stream.read(1 << 20), b""):
+                digest.update(chunk)
+                f.write(chunk)
+
+        video_hash = digest.hexdigest()
+        # From the original name (checked by allowed_file); secure_filename
+        # drops non-ASCII stems, e.g. "видео.mp4" -> "mp4"
+        extension = file.filename.rsplit(".", 1)[1].lower()
+        filename = f"{video_hash[:16]}.{extension}"
+        os.replace(tmp_path, os.path.join(upload_folder, filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return filename, video_hash
+
+
+def finished_job(job_id):
+    # The job if it finished and its files are still there; a cached result
+    # can be evicted while finished jobs still point at it
+    job = job_queue.get(job_id)
+    if job is None or job["status"] != "done":
+        return None, (jsonify({"error": "Unknown or unfinished job"}), 404)
+    if not os.path.exists(job["result"]["timeline"]):
+        return None, (jsonify({"error": "Result files expired; upload the video again"}), 404)
+    return job, None
+
+
+def result_file(path):
+    # Paths relative to RESULT_FOLDER, so they can be served by /results/<path>
+    return os.path.relpath(path, RESULT_FOLDER).replace(os.sep, "/")
+
+
 # ===================== ROUTES =====================
 
-@app.route("/")
+@routes.route("/")
 def home():
     return render_template("index.html")
 
 
-@app.route("/dashboard")
+@routes.route("/dashboard")
 def dashboard():
     return render_template("dashboard.html")
 
 
-@app.route("/upload", methods=["POST"])
+@routes.route("/upload", methods=["POST"])
 def upload():
     if "video" not in request.files:
-        return redirect(url_for("dashboard"))
+        return jsonify({"error": "No video file provided"}), 400
 
     file = request.files["video"]
 
     if file.filename == "":
-        return redirect(url_for("dashboard"))
-
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+        return jsonify({"error": "No video file provided"}), 400
+
+    if not (file and allowed_file(file.filename)):
+        return jsonify({"error": "Unsupported file type"}), 400
+
+    upload_folder = UPLOAD_FOLDER
+    os.makedirs(upload_folder, exist_ok=True)
+
+    filename, video_hash = save_upload(file, upload_folder)
+    video_path = os.path.join(upload_folder, filename)
+
+    # ✅ CORRECT WEB URL
+    video_url = url_for("static", filename=f"uploads/{filename}")
+    meta = {
+        "video_url": video_url,
+        "video_hash": video_hash,
+        "video_filename": file.filename,
+        "dog_id": (request.form.get("dog_id") or "").strip()[:64] or "default"
+    }
+
+    # ================= CACHED RESULT =================
+    cached = result_cache.get(analyzer.result_key(video_hash))
+    if cached is not None:
+        job_id = job_queue.add_completed(video_path, cached, meta=meta)
+        return jsonify({
+            "job_id": job_id,
+            "cached": True,
+            "status_url": url_for(".job_status", job_id=job_id),
+            "result_url": url_for(".job_result", job_id=job_id)
+        }), 200
+
+    # ================= AI PROCESS (queued) =================
+    try:
+        job_id = job_queue.submit(video_path, RESULT_FOLDER, meta=meta, video_hash=video_hash)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({
+        "job_id": job_id,
+        "cached": False,
+        "status_url": url_for(".job_status", job_id=job_id),
+        "result_url": url_for(".job_result", job_id=job_id)
+    }), 202
+
+
+@routes.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    return jsonify({
+        "job_id": job_id,
+        "status": job["status"],
+        "created": job["created"],
+        "finished": job["finished"],
+        "error": job["error"],
+        "live": job["live"],
+        "result_url": url_for(".job_result", job_id=job_id) if job["status"] == "done" else None
+    })
+
+
+@routes.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+
+    if job["status"] != "done":
+        return redirect(url_for(".dashboard"))
+
+    result = job["result"]
+    if not os.path.exists(result["timeline"]):
+        abort(404)
 
-        upload_folder = app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_folder, exist_ok=True)
+    return render_template(
+        "result.html", video_url=job["meta"].get("video_url"),
+        behavior_profile=result["behavior_profile"],
+        doctor_summary=result["doctor_summary"],
+        audio_file=result_file(result["audio_path"]),
+        timeline_url=url_for(".job_timeline", job_id=job_id),
+        graphs_url=url_for(".job_graphs", job_id=job_id)
+    )
 
-        video_path = os.path.join(upload_folder, filename)
-        file.save(video_path)
 
-        # ✅ CORRECT WEB URL
-        video_url = url_for("static", filename=f"uploads/{filename}")
+@routes.route("/jobs/<job_id>/timeline")
+def job_timeline(job_id):
+    job, error = finished_job(job_id)
+    if error is not None:
+        return error
+
+    # Encoded state timelines (vocab + codes); result.html charts them client-side
+    return send_file(job["result"]["timeline"], mimetype="application/json", max_age=3600)
 
-        # ================= AI PROCESS =================
-        result = analyzer.analyze_video(video_path, output_dir=app.config["RESULT_FOLDER"])
 
-        session["result"] = result
-        session["video_url"] = video_url
+@routes.route("/jobs/<job_id>/frames")
+def job_frames(job_id):
+    job, error = finished_job(job_id)
+    if error is not None:
+        return error
+
+    # Per-frame records are expanded from the segments only for the requested page
+    with open(job["result"]["timeline"]) as f:
+        timeline = json.load(f)
+
+    start = max(0, request.args.get("start", 0, type=int))
+    limit = min(max(1, request.args.get("limit", 500, type=int)), 5000)
+    frames = list(iter_frames(timeline, start, start + limit))
+
+    if request.args.get("labels"):
+        for record in frames:
+            for key, labels in timeline["vocabulary"].items():
+                record[key] = labels[record[key]]
+
+    return jsonify({
+        "count": timeline["count"],
+        "start": start,
+        "frames": frames,
+        "vocabulary": None if request.args.get("labels") else timeline["vocabulary"]
+    })
+
+
+@routes.route("/jobs/<job_id>/graphs", methods=["GET", "POST"])
+def job_graphs(job_id):
+    job, error = finished_job(job_id)
+    if error is not None:
+        return error
+
+    # POST starts the PNG export in the render process; GET polls it
+    path = graph_path(job["result"])
+    if request.method == "POST":
+        graph_renderer.submit(job["result"]["timeline"], path)
+
+    status = graph_renderer.status(path)
+    return jsonify({
+        "status": status,
+        "url": url_for(".serve_results", filename=result_file(path)) if status == "done" else None
+    }), 200 if status == "done" else 202
+
+
+# ===================== HISTORY API =====================
+# Keyset-paginated: pass next_cursor back as ?cursor= for the next page
+
+def page_limit():
+    return min(max(1, request.args.get("limit", history_page_size, type=int)), history_max_page_size)
+
+
+@routes.route("/history/videos")
+def history_videos():
+    try:
+        videos, next_cursor = db.get_videos_page(
+            dog_id=request.args.get("dog_id"),
+            cursor=request.args.get("cursor"),
+            limit=page_limit()
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"videos": videos, "next_cursor": next_cursor})
+
+
+@routes.route("/history/videos/<int:video_id>/similar")
+def history_similar(video_id):
+    # Nearest sessions by behavior fingerprint (see BehaviorFingerprint)
+    fingerprint = fingerprint_index.get(video_id)
+    if fingerprint is None:
+        return jsonify({"error": "No fingerprint stored for this video"}), 404
+
+    k = min(max(1, request.args.get("k", 10, type=int)), similar_max_results)
+    # The same clip saved for another dog isn't a different session
+    nearest = fingerprint_index.query(fingerprint, k=k, exclude=db.get_same_clip_ids(video_id))
+    videos = db.get_videos_by_ids([key for key, _ in nearest])
+
+    return jsonify({
+        "video_id": video_id,
+        "similar": [
+            dict(videos[key], distance=round(distance, 4))
+            for key, distance in nearest if key in videos
+        ]
+    })
+
+
+@routes.route("/history/dogs")
+def history_dogs():
+    dogs, next_cursor = db.get_dog_summaries(cursor=request.args.get("cursor"), limit=page_limit())
+    return jsonify({"dogs": dogs, "next_cursor": next_cursor})
+
+
+@routes.route("/history/dogs/<dog_id>")
+def history_dog(dog_id):
+    summary = db.get_dog_summary(dog_id)
+    if summary is None:
+        return jsonify({"error": "Unknown dog"}), 404
+    return jsonify(summary)
+
+
+@routes.route("/history/dogs/<dog_id>/trend")
+def history_dog_trend(dog_id):
+    # Stored per-session metrics and rolling aggregates; no frames are read
+    limit = min(max(1, request.args.get("limit", trend_max_points, type=int)), trend_max_points)
+    try:
+        series = db.get_emotion_trend(
+            dog_id, since=request.args.get("since"), until=request.args.get("until"), limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "dog_id": dog_id,
+        "latest": series[-1]["trend"] if series else None,
+        "series": series
+    })
+
+
+@routes.route("/get_answer", methods=["POST"])
+def get_answer():
+    response = analyzer._common_question(request.json["question"])
+    return {"answer": response}
+    
 
-        return redirect(url_for("result"))
+@routes.route("/get_answer/stats")
+def get_answer_stats():
+    return jsonify(analyzer.question_cache_stats())
 
-    return redirect(url_for("dashboard"))
 
-@app.route("/result")
-def result():
-    result = session.get("result")
+@routes.route("/get_answer/stream", methods=["GET", "POST"])
+def get_answer_stream():
+    if request.method == "POST":
+        question = (request.get_json(silent=True) or {}).get("question", "")
+    else:
+        question = request.args.get("question", "")
 
-    video_url = session.get("video_url")
-    if not result:
-        return redirect(url_for("dashboard"))
+    def events():
+        for event, data in analyzer._stream_common_question(question):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    return render_template(
-        "result.html", video_url=video_url,
-        behavior_profile=result["behavior_profile"],
-        doctor_summary=result["doctor_summary"],
-        audio_file=os.path.basename(result["audio_path"]),
-        graphs={
-            "tail": os.path.basename(result["graphs"]["tail"]),
-            "ears": os.path.basename(result["graphs"]["ears"]),
-            "head": os.path.basename(result["graphs"]["head"]),
-            "posture": os.path.basename(result["graphs"]["posture"])
-        }
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        # Don't let proxies buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-@app.route("/get_answer", methods=["POST"])
-def get_answer():
-    response = analyzer._common_question(request.json["question"])
-    return {"answer": response}
-    
 
-@app.route("/results/<filename>")
+@routes.route("/results/<path:filename>")
 def serve_results(filename):
-    return send_from_directory(app.config["RESULT_FOLDER"], filename)
+    return send_from_directory(RESULT_FOLDER, filename)
+
+
+# ===================== APP =====================
+def create_app():
+    global analyzer, result_cache, graph_renderer, db, fingerprint_index, job_queue
+
+    app = Flask(__name__)
+    app.secret_key = "dogai_super_secret_key"
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(RESULT_FOLDER, exist_ok=True)
+
+    app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+    app.config["RESULT_FOLDER"] = RESULT_FOLDER
+
+    # Serves the chatbot and result cache keys; video analysis runs on the job queue workers.
+    analyzer = build_default_analyzer()
+
+    result_cache = ResultCache(
+        RESULT_CACHE_FOLDER,
+        max_bytes=result_cache_max_mb * 1024 * 1024,
+        ttl_seconds=result_cache_ttl_hours * 3600
+    )
+
+    # PNG exports render in a separate process, never on request or analysis threads
+    graph_renderer = GraphRenderer(workers=graph_render_workers)
+
+    db = DogHealthDB(
+        database_path,
+        pool_size=database_pool_size,
+        busy_timeout=database_busy_timeout,
+        trends=EmotionTrends(
+            windows_days=trend_windows_days,
+            change_threshold=trend_change_threshold,
+            change_drift=trend_change_drift,
+            min_sessions=trend_min_sessions
+        )
+    )
+
+    # Behavior fingerprints of every stored analysis, in memory for similarity queries
+    # Backfilled fingerprints have no tail intensity and are only ranked against each other
+    fingerprint_index = SimilarityIndex(FINGERPRINT_SIZE, optional=TAIL_INTENSITY_BLOCK)
+    fingerprint_index.add_many(*db.get_fingerprints())
+    print(f"🔎 Loaded {len(fingerprint_index)} behavior fingerprints")
+
+    job_queue = JobQueue(
+        analyzer_factory=build_default_analyzer,
+        workers=analysis_workers,
+        mode=analysis_worker_mode,
+        max_pending=max_pending_jobs,
+        result_cache=result_cache,
+        on_finished=on_job_finished
+    )
+
+    app.register_blueprint(routes)
+    return app
 
 
 # ===================== RUN =====================
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
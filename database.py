@@ -1,63 +1,483 @@
 # database.py
 import sqlite3
+import threading
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import json
 
+import numpy as np
+
+from services.BehaviorSegments import iter_frames
+from services.EmotionTrends import EmotionTrends, TREND_METRICS, to_day
+from services.BehaviorFingerprint import behavior_fingerprint, FINGERPRINT_VERSION, FINGERPRINT_SIZE
+from services.StateVocabulary import STATE_VOCABULARY
+
+# =========================================================
+# SCHEMA
+# =========================================================
+def _backfill_emotion_series(db, conn):
+    # Older videos only stored the mental-health score
+    rows = conn.execute('''
+        SELECT id, dog_id, upload_date, mental_health_percent
+        FROM videos
+        WHERE mental_health_percent IS NOT NULL
+    ''').fetchall()
+
+    dogs = {}
+    for video_id, dog_id, upload_date, mental_health in rows:
+        day = to_day(upload_date)
+        if day is None:
+            continue
+        conn.execute('''
+            INSERT INTO emotion_series (video_id, dog_id, recorded_at, day, mental_health)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (video_id, dog_id, upload_date, day, mental_health))
+        dogs[dog_id] = min(dogs.get(dog_id, (day, video_id)), (day, video_id))
+
+    for dog_id, (day, video_id) in dogs.items():
+        db._refresh_trends(conn, dog_id, day, video_id)
+
+
+def _backfill_fingerprints(db, conn):
+    # From the stored timelines; their tail intensity wasn't kept. Timelines
+    # encoded with another vocabulary can't be compared and are skipped.
+    vocabulary = {key: vocab.labels.tolist() for key, vocab in STATE_VOCABULARY.items()}
+    timelines = conn.execute('''
+        SELECT t.video_id, v.dog_id, t.frame_count, t.vocabulary
+        FROM video_timelines t JOIN videos v ON v.id = t.video_id
+    ''').fetchall()
+
+    for video_id, dog_id, frame_count, stored_vocabulary in timelines:
+        if not stored_vocabulary or json.loads(stored_vocabulary) != vocabulary:
+            continue
+        segments = {}
+        for component, *segment in conn.execute('''
+            SELECT component, state, start_frame, end_frame, start_ts, end_ts, start_index, end_index
+            FROM behavior_segments
+            WHERE video_id = ?
+            ORDER BY component, start_index
+        ''', (video_id,)):
+            segments.setdefault(component, []).append(segment)
+
+        db._save_fingerprint(conn, video_id, dog_id, behavior_fingerprint(segments, frame_count))
+
+
+# Migrations run in order; PRAGMA user_version records how many have been
+# applied, so existing dog_health.db files are upgraded in place. Never edit
+# a released migration, append a new one.
+MIGRATIONS = [
+    # 1: original schema
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS videos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_filename TEXT,
+            saved_video_path TEXT,
+            upload_date TIMESTAMP,
+            tail_summary TEXT,
+            ear_summary TEXT,
+            head_summary TEXT,
+            posture_summary TEXT,
+            health_status TEXT,
+            activity_status TEXT,
+            recommendation TEXT,
+            graphs_path TEXT,
+            duration_seconds REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS frame_analysis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id INTEGER,
+            frame_number INTEGER,
+            tail_state TEXT,
+            ear_state TEXT,
+            head_state TEXT,
+            posture_state TEXT,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+        '''
+    ],
+    # 2: run-length encoded behavior (one row per state change per component)
+    # and what's needed to expand it back to frames
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS behavior_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id INTEGER,
+            component TEXT,
+            state INTEGER,
+            start_frame INTEGER,
+            end_frame INTEGER,
+            start_ts REAL,
+            end_ts REAL,
+            start_index INTEGER,
+            end_index INTEGER,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS video_timelines (
+            video_id INTEGER PRIMARY KEY,
+            frame_count INTEGER,
+            samples TEXT,
+            vocabulary TEXT,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+        '''
+    ],
+    # 3: indexes for the per-video lookups and the history listing
+    [
+        'CREATE INDEX IF NOT EXISTS idx_frame_analysis_video ON frame_analysis (video_id, frame_number)',
+        'CREATE INDEX IF NOT EXISTS idx_behavior_segments_video ON behavior_segments (video_id, component, start_index)',
+        'CREATE INDEX IF NOT EXISTS idx_videos_upload_date ON videos (upload_date)'
+    ],
+    # 4: videos belong to a dog; dog_summaries is kept up to date on every
+    # save so listing dogs never aggregates over their videos
+    [
+        "ALTER TABLE videos ADD COLUMN dog_id TEXT NOT NULL DEFAULT 'default'",
+        'ALTER TABLE videos ADD COLUMN frame_count INTEGER',
+        'ALTER TABLE videos ADD COLUMN mental_health_percent REAL',
+        '''
+        UPDATE videos SET frame_count = COALESCE(
+            (SELECT frame_count FROM video_timelines t WHERE t.video_id = videos.id),
+            (SELECT COUNT(*) FROM frame_analysis f WHERE f.video_id = videos.id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_videos_dog_upload_date ON videos (dog_id, upload_date)',
+        '''
+        CREATE TABLE IF NOT EXISTS dog_summaries (
+            dog_id TEXT PRIMARY KEY,
+            video_count INTEGER NOT NULL,
+            frame_count INTEGER NOT NULL,
+            mental_health_sum REAL NOT NULL,
+            mental_health_count INTEGER NOT NULL,
+            first_upload TIMESTAMP,
+            last_upload TIMESTAMP,
+            last_video_id INTEGER,
+            last_tail_state TEXT,
+            last_ear_state TEXT,
+            last_head_state TEXT,
+            last_posture_state TEXT,
+            last_health_status TEXT
+        )
+        ''',
+        # Backfill from the videos already stored
+        '''
+        INSERT OR REPLACE INTO dog_summaries
+        (dog_id, video_count, frame_count, mental_health_sum, mental_health_count, first_upload, last_upload, last_video_id)
+        SELECT dog_id, COUNT(*), COALESCE(SUM(frame_count), 0),
+               COALESCE(SUM(mental_health_percent), 0), COUNT(mental_health_percent),
+               MIN(upload_date), MAX(upload_date),
+               (SELECT id FROM videos latest WHERE latest.dog_id = videos.dog_id
+                ORDER BY upload_date DESC, id DESC LIMIT 1)
+        FROM videos
+        GROUP BY dog_id
+        ''',
+        '''
+        UPDATE dog_summaries SET
+            last_tail_state = (SELECT tail_summary FROM videos WHERE id = last_video_id),
+            last_ear_state = (SELECT ear_summary FROM videos WHERE id = last_video_id),
+            last_head_state = (SELECT head_summary FROM videos WHERE id = last_video_id),
+            last_posture_state = (SELECT posture_summary FROM videos WHERE id = last_video_id),
+            last_health_status = (SELECT health_status FROM videos WHERE id = last_video_id)
+        '''
+    ],
+    # 5: emotional metrics per session, with the rolling aggregates as of
+    # that session (JSON) and the change detector state carried forward
+    [
+        f'''
+        CREATE TABLE IF NOT EXISTS emotion_series (
+            video_id INTEGER PRIMARY KEY,
+            dog_id TEXT NOT NULL,
+            recorded_at TIMESTAMP NOT NULL,
+            day REAL NOT NULL,
+            {", ".join(f"{metric} REAL" for metric in TREND_METRICS)},
+            trend TEXT,
+            detector TEXT,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_emotion_series_dog_day ON emotion_series (dog_id, day)',
+        _backfill_emotion_series
+    ],
+    # 6: behavior fingerprints (float32 bytes) for similarity search
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS behavior_fingerprints (
+            video_id INTEGER PRIMARY KEY,
+            dog_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+        ''',
+        _backfill_fingerprints
+    ],
+    # 7: uploads are keyed by content hash; the same clip saved again for
+    # the same dog (a refresh or retry) is not a new session
+    [
+        'ALTER TABLE videos ADD COLUMN video_hash TEXT',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_videos_hash_dog ON videos (video_hash, dog_id)'
+    ],
+    # 8: which analysis a video row holds (the analyzer's result cache key:
+    # model, analyzer version, sampling, scoring), so analyzing a saved clip
+    # again with another one replaces its results
+    [
+        'ALTER TABLE videos ADD COLUMN analysis_key TEXT'
+    ]
+]
+
+# Summary columns taken from a dog's most recent video
+LAST_SEEN = [
+    "last_upload", "last_video_id", "last_tail_state", "last_ear_state",
+    "last_head_state", "last_posture_state", "last_health_status"
+]
+
+VIDEO_LIST_COLUMNS = [
+    "id", "dog_id", "video_filename", "upload_date", "health_status", "activity_status",
+    "mental_health_percent", "frame_count", "duration_seconds", "saved_video_path", "graphs_path"
+]
+
+# WAL lets readers run while an analysis is being saved; NORMAL sync is
+# safe in WAL mode (a power cut can only lose the last commits)
+PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",   # KiB
+    "PRAGMA temp_store = MEMORY"
+]
+
+
+# =========================================================
+# CONNECTIONS
+# =========================================================
+class ConnectionManager:
+    # Reads go through a small pool of connections, one thread per
+    # connection at a time; in WAL mode they never wait for writers. All
+    # writes run on one writer thread with its own connection, so they are
+    # queued here instead of contending for SQLite's write lock.
+    def __init__(self, db_path, pool_size=4, busy_timeout=5.0):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.readers = []
+        self.closed = False
+
+        # Autocommit mode: the sqlite3 module's implicit transactions start
+        # only before DML, so DDL in a migration would commit on its own.
+        # Writes use transaction() instead.
+        self.writer_conn = self._connect(isolation_level=None)
+        self.writer_conn.execute("PRAGMA journal_mode = WAL")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+    def _connect(self, **kwargs):
+        # timeout is SQLite's busy handler: wait for a lock instead of failing
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False, **kwargs)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    # Explicit transaction on the writer connection, DDL included
+    @contextmanager
+    def transaction(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def read(self):
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.closed:
+                raise sqlite3.ProgrammingError("Database is closed")
+            if len(self.readers) < self.pool_size:
+                conn = self._connect()
+                self.readers.append(conn)
+                return conn
+        return self.idle.get()
+
+    # fn(conn) runs on the writer thread; blocks until it is done and
+    # returns its result (or raises its exception)
+    def write(self, fn):
+        return self.writer.submit(self.retry, fn, self.writer_conn).result()
+
+    # Some lock conflicts are reported straight away instead of going
+    # through the busy handler (e.g. a WAL checkpoint from another process),
+    # so they are retried with backoff until busy_timeout runs out
+    def retry(self, fn, conn):
+        deadline = time.monotonic() + self.busy_timeout
+        delay = 0.01
+        while True:
+            try:
+                return fn(conn)
+            except sqlite3.OperationalError as e:
+                message = str(e)
+                if "locked" not in message and "busy" not in message or time.monotonic() >= deadline:
+                    raise
+                print(f"⏳ Database busy, retrying: {message}")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.writer.shutdown(wait=True)
+        self.writer_conn.close()
+        for conn in self.readers:
+            conn.close()
+
+
+# =========================================================
+# DATABASE
+# =========================================================
 class DogHealthDB:
-    def __init__(self, db_path="dog_health.db"):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.create_tables()
-    
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        # Videos table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS videos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_filename TEXT,
-                saved_video_path TEXT,
-                upload_date TIMESTAMP,
-                tail_summary TEXT,
-                ear_summary TEXT,
-                head_summary TEXT,
-                posture_summary TEXT,
-                health_status TEXT,
-                activity_status TEXT,
-                recommendation TEXT,
-                graphs_path TEXT,
-                duration_seconds REAL
-            )
-        ''')
-        
-        # Frames table for detailed data
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS frame_analysis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id INTEGER,
-                frame_number INTEGER,
-                tail_state TEXT,
-                ear_state TEXT,
-                head_state TEXT,
-                posture_state TEXT,
-                FOREIGN KEY (video_id) REFERENCES videos (id)
-            )
-        ''')
-        
-        self.conn.commit()
-    
+    def __init__(self, db_path="dog_health.db", pool_size=4, busy_timeout=5.0, trends=None):
+        self.trends = trends or EmotionTrends()
+        self.connections = ConnectionManager(db_path, pool_size, busy_timeout)
+        self.connections.write(self._migrate)
+
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            # Each migration and its version bump commit together
+            with self.connections.transaction(conn):
+                for statement in statements:
+                    # Data migrations are functions of (db, conn)
+                    if callable(statement):
+                        statement(self, conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            print(f"🗄️ Applied database migration {number}")
+
     def save_video_analysis(self, video_data):
-        cursor = self.conn.cursor()
+        return self.connections.write(lambda conn: self._save_video_analysis(conn, video_data))
+
+    # Returns the new video id, or the existing one when this dog already
+    # has a video with the same video_hash. That video is left alone if it
+    # holds the same analysis (analysis_key), and updated in place otherwise.
+    def _save_video_analysis(self, conn, video_data):
+        # One transaction for the video, its frames and its segments
+        with self.connections.transaction(conn):
+            cursor = conn.cursor()
+            dog_id = video_data.get('dog_id') or 'default'
+
+            frame_count = video_data.get('frame_count')
+            if frame_count is None:
+                frame_count = video_data['timeline']['count'] if 'timeline' in video_data else len(video_data.get('frame_data', []))
+
+            if video_data.get('video_hash'):
+                existing = cursor.execute('''
+                    SELECT id, analysis_key, upload_date, frame_count, mental_health_percent
+                    FROM videos WHERE video_hash = ? AND dog_id = ?
+                ''', (video_data['video_hash'], dog_id)).fetchone()
+                if existing and existing[1] == video_data.get('analysis_key'):
+                    print(f"♻️ Video already saved for dog {dog_id} as {existing[0]}")
+                    return existing[0]
+                if existing:
+                    self._replace_video_analysis(cursor, existing, video_data, frame_count)
+                    print(f"🔄 Replaced the analysis of video {existing[0]} for dog {dog_id}")
+                    return existing[0]
+
+            cursor.execute('''
+                INSERT INTO videos 
+                (video_filename, saved_video_path, upload_date, tail_summary, ear_summary, 
+                 head_summary, posture_summary, health_status, activity_status, 
+                 recommendation, graphs_path, duration_seconds,
+                 dog_id, frame_count, mental_health_percent, video_hash, analysis_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                video_data['video_filename'],
+                video_data['saved_video_path'],
+                video_data['upload_date'],
+                video_data['tail_summary'],
+                video_data['ear_summary'],
+                video_data['head_summary'],
+                video_data['posture_summary'],
+                video_data['health_status'],
+                video_data['activity_status'],
+                video_data['recommendation'],
+                video_data['graphs_path'],
+                video_data['duration_seconds'],
+                dog_id,
+                frame_count,
+                video_data.get('mental_health_percent'),
+                video_data.get('video_hash'),
+                video_data.get('analysis_key')
+            ))
+            video_id = cursor.lastrowid
+
+            self._save_results(cursor, video_id, video_data)
+            self._update_dog_summary(cursor, video_id, video_data, frame_count)
+
+            if video_data.get('emotional_report'):
+                self._record_emotions(cursor, video_id, video_data)
+
+        return video_id
+
+    # Frames, segments and fingerprint of a video
+    def _save_results(self, cursor, video_id, video_data):
+        # Save frame data
+        if 'frame_data' in video_data:
+            cursor.executemany('''
+                INSERT INTO frame_analysis 
+                (video_id, frame_number, tail_state, ear_state, head_state, posture_state)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                (
+                    video_id,
+                    frame['frame_number'],
+                    frame['tail_state'],
+                    frame['ear_state'],
+                    frame['head_state'],
+                    frame['posture_state']
+                )
+                for frame in video_data['frame_data']
+            ))
+
+        # Save behavior segments (timeline.json from the analyzer)
+        if 'timeline' in video_data:
+            self._save_timeline(cursor, video_id, video_data['timeline'])
+
+        if video_data.get('fingerprint') is not None:
+            self._save_fingerprint(cursor, video_id, video_data.get('dog_id') or 'default', video_data['fingerprint'])
+
+    # The same session analyzed again (new analyzer version, model or
+    # scoring): its results, its share of the dog summary and its place in
+    # the trends are replaced; upload date and session count stay.
+    def _replace_video_analysis(self, cursor, existing, video_data, frame_count):
+        video_id, _, upload_date, old_frame_count, old_mental_health = existing
+        dog_id = video_data.get('dog_id') or 'default'
+        mental_health = video_data.get('mental_health_percent')
+
         cursor.execute('''
-            INSERT INTO videos 
-            (video_filename, saved_video_path, upload_date, tail_summary, ear_summary, 
-             head_summary, posture_summary, health_status, activity_status, 
-             recommendation, graphs_path, duration_seconds)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            UPDATE videos SET
+                tail_summary = ?, ear_summary = ?, head_summary = ?, posture_summary = ?,
+                health_status = ?, activity_status = ?, recommendation = ?, graphs_path = ?,
+                duration_seconds = ?, frame_count = ?, mental_health_percent = ?, analysis_key = ?
+            WHERE id = ?
         ''', (
-            video_data['video_filename'],
-            video_data['saved_video_path'],
-            video_data['upload_date'],
             video_data['tail_summary'],
             video_data['ear_summary'],
             video_data['head_summary'],
@@ -66,31 +486,239 @@ class DogHealthDB:
             video_data['activity_status'],
             video_data['recommendation'],
             video_data['graphs_path'],
-            video_data['duration_seconds']
+            video_data['duration_seconds'],
+            frame_count,
+            mental_health,
+            video_data.get('analysis_key'),
+            video_id
         ))
-        video_id = cursor.lastrowid
-        
-        # Save frame data
-        if 'frame_data' in video_data:
-            for frame in video_data['frame_data']:
-                cursor.execute('''
-                    INSERT INTO frame_analysis 
-                    (video_id, frame_number, tail_state, ear_state, head_state, posture_state)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    video_id,
-                    frame['frame_number'],
-                    frame['tail_state'],
-                    frame['ear_state'],
-                    frame['head_state'],
-                    frame['posture_state']
-                ))
-        
-        self.conn.commit()
-        return video_id
+
+        for table in ('frame_analysis', 'behavior_segments', 'video_timelines', 'behavior_fingerprints', 'emotion_series'):
+            cursor.execute(f'DELETE FROM {table} WHERE video_id = ?', (video_id,))
+        self._save_results(cursor, video_id, video_data)
+
+        cursor.execute('''
+            UPDATE dog_summaries SET
+                frame_count = frame_count - ? + ?,
+                mental_health_sum = mental_health_sum - ? + ?,
+                mental_health_count = mental_health_count - ? + ?,
+                last_tail_state = CASE WHEN last_video_id = ? THEN ? ELSE last_tail_state END,
+                last_ear_state = CASE WHEN last_video_id = ? THEN ? ELSE last_ear_state END,
+                last_head_state = CASE WHEN last_video_id = ? THEN ? ELSE last_head_state END,
+                last_posture_state = CASE WHEN last_video_id = ? THEN ? ELSE last_posture_state END,
+                last_health_status = CASE WHEN last_video_id = ? THEN ? ELSE last_health_status END
+            WHERE dog_id = ?
+        ''', (
+            old_frame_count or 0, frame_count or 0,
+            old_mental_health or 0, mental_health or 0,
+            0 if old_mental_health is None else 1, 0 if mental_health is None else 1,
+            video_id, video_data['tail_summary'],
+            video_id, video_data['ear_summary'],
+            video_id, video_data['head_summary'],
+            video_id, video_data['posture_summary'],
+            video_id, video_data['health_status'],
+            dog_id
+        ))
+
+        # The session keeps its place in the series
+        video_data = dict(video_data, upload_date=upload_date)
+        if video_data.get('emotional_report'):
+            self._record_emotions(cursor, video_id, video_data)
+        else:
+            day = to_day(upload_date)
+            if day is not None:
+                self._refresh_trends(cursor, dog_id, day, video_id)
+
+    # =========================================================
+    # FINGERPRINTS
+    # =========================================================
+    def _save_fingerprint(self, conn, video_id, dog_id, fingerprint):
+        vector = np.asarray(fingerprint, dtype=np.float32)
+        if vector.shape != (FINGERPRINT_SIZE,):
+            print(f"⚠️ Not storing fingerprint of video {video_id}: expected {FINGERPRINT_SIZE} values, got {vector.size}")
+            return
+        conn.execute('''
+            INSERT OR REPLACE INTO behavior_fingerprints (video_id, dog_id, version, vector)
+            VALUES (?, ?, ?, ?)
+        ''', (video_id, dog_id, FINGERPRINT_VERSION, vector.tobytes()))
+
+    # All current-version fingerprints as (video ids, float32 matrix), for
+    # loading a SimilarityIndex
+    def get_fingerprints(self):
+        with self.connections.read() as conn:
+            rows = self.connections.retry(lambda conn: conn.execute('''
+                SELECT video_id, vector FROM behavior_fingerprints
+                WHERE version = ?
+                ORDER BY video_id
+            ''', (FINGERPRINT_VERSION,)).fetchall(), conn)
+
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(-1, FINGERPRINT_SIZE)
+        return ids, vectors
+
+    # Ids of every stored copy of this video's clip (same video_hash), itself included
+    def get_same_clip_ids(self, video_id):
+        with self.connections.read() as conn:
+            rows = self.connections.retry(lambda conn: conn.execute('''
+                SELECT id FROM videos
+                WHERE video_hash = (SELECT video_hash FROM videos WHERE id = ?)
+            ''', (video_id,)).fetchall(), conn)
+        return {video_id} | {row[0] for row in rows}
+
+    def get_videos_by_ids(self, video_ids):
+        if not video_ids:
+            return {}
+        with self.connections.read() as conn:
+            rows = self.connections.retry(lambda conn: conn.execute(f'''
+                SELECT {", ".join(VIDEO_LIST_COLUMNS)}
+                FROM videos
+                WHERE id IN ({", ".join("?" for _ in video_ids)})
+            ''', list(video_ids)).fetchall(), conn)
+        return {row[0]: dict(zip(VIDEO_LIST_COLUMNS, row)) for row in rows}
+
+    # =========================================================
+    # TRENDS
+    # =========================================================
+    def _record_emotions(self, cursor, video_id, video_data):
+        day = to_day(video_data['upload_date'])
+        if day is None:
+            print(f"⚠️ Not adding video {video_id} to the trends: bad upload_date {video_data['upload_date']!r}")
+            return
+
+        dog_id = video_data.get('dog_id') or 'default'
+        report = video_data['emotional_report']
+        cursor.execute(f'''
+            INSERT INTO emotion_series (video_id, dog_id, recorded_at, day, {", ".join(TREND_METRICS)})
+            VALUES (?, ?, ?, ?, {", ".join("?" for _ in TREND_METRICS)})
+        ''', (video_id, dog_id, video_data['upload_date'], day, *[report.get(key) for key in TREND_METRICS.values()]))
+
+        self._refresh_trends(cursor, dog_id, day, video_id)
+
+    # Recomputes the aggregates from session (day, video_id) onwards. A new
+    # session is normally the latest one, so this reads one window of
+    # sessions and updates one row; an older session also replays the later ones.
+    def _refresh_trends(self, conn, dog_id, day, video_id):
+        previous = conn.execute('''
+            SELECT detector FROM emotion_series
+            WHERE dog_id = ? AND (day, video_id) < (?, ?)
+            ORDER BY day DESC, video_id DESC
+            LIMIT 1
+        ''', (dog_id, day, video_id)).fetchone()
+        state = json.loads(previous[0]) if previous and previous[0] else None
+
+        rows = conn.execute(f'''
+            SELECT video_id, day, {", ".join(TREND_METRICS)}
+            FROM emotion_series
+            WHERE dog_id = ? AND day > ?
+            ORDER BY day, video_id
+        ''', (dog_id, day - self.trends.longest)).fetchall()
+
+        first = next((i for i, row in enumerate(rows) if (row[1], row[0]) >= (day, video_id)), None)
+        if first is None:
+            # No session at or after this one (it was removed and was the last)
+            return
+        sessions = [(row[1], dict(zip(TREND_METRICS, row[2:]))) for row in rows]
+
+        updates = self.trends.replay(sessions, first, state)
+        conn.executemany('UPDATE emotion_series SET trend = ?, detector = ? WHERE video_id = ?', [
+            (json.dumps(trend), json.dumps(detector), row[0])
+            for row, (trend, detector) in zip(rows[first:], updates)
+        ])
+
+    # Newest `limit` sessions of a dog in [since, until] (ISO dates), oldest first
+    def get_emotion_trend(self, dog_id, since=None, until=None, limit=365):
+        with self.connections.read() as conn:
+            return self.connections.retry(lambda conn: self._get_emotion_trend(conn, dog_id, since, until, limit), conn)
+
+    def _get_emotion_trend(self, conn, dog_id, since, until, limit):
+        where, params = ['dog_id = ?'], [dog_id]
+        for value, op in ((since, '>='), (until, '<=')):
+            if value:
+                day = to_day(value)
+                if day is None:
+                    raise ValueError(f"Bad date: {value!r}")
+                where.append(f'day {op} ?')
+                params.append(day)
+
+        rows = conn.execute(f'''
+            SELECT video_id, recorded_at, {", ".join(TREND_METRICS)}, trend
+            FROM emotion_series
+            WHERE {" AND ".join(where)}
+            ORDER BY day DESC, video_id DESC
+            LIMIT ?
+        ''', params + [limit]).fetchall()
+
+        series = []
+        for video_id, recorded_at, *values, trend in reversed(rows):
+            series.append({
+                'video_id': video_id,
+                'recorded_at': recorded_at,
+                'metrics': dict(zip(TREND_METRICS, values)),
+                'trend': json.loads(trend) if trend else None
+            })
+        return series
+
+    def _update_dog_summary(self, cursor, video_id, video_data, frame_count):
+        mental_health = video_data.get('mental_health_percent')
+        # Last-seen columns only move forward in upload order
+        last_seen = ",\n".join(
+            f"{column} = CASE WHEN excluded.last_upload >= COALESCE(last_upload, '') "
+            f"THEN excluded.{column} ELSE {column} END"
+            for column in LAST_SEEN
+        )
+        cursor.execute(f'''
+            INSERT INTO dog_summaries
+            (dog_id, video_count, frame_count, mental_health_sum, mental_health_count, first_upload,
+             {", ".join(LAST_SEEN)})
+            VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (dog_id) DO UPDATE SET
+                video_count = video_count + 1,
+                frame_count = frame_count + excluded.frame_count,
+                mental_health_sum = mental_health_sum + excluded.mental_health_sum,
+                mental_health_count = mental_health_count + excluded.mental_health_count,
+                first_upload = MIN(first_upload, excluded.first_upload),
+                {last_seen}
+        ''', (
+            video_data.get('dog_id') or 'default',
+            frame_count or 0,
+            mental_health or 0,
+            0 if mental_health is None else 1,
+            video_data['upload_date'],
+            video_data['upload_date'],
+            video_id,
+            video_data['tail_summary'],
+            video_data['ear_summary'],
+            video_data['head_summary'],
+            video_data['posture_summary'],
+            video_data['health_status']
+        ))
+
+    def _save_timeline(self, cursor, video_id, timeline):
+        cursor.execute('''
+            INSERT INTO video_timelines (video_id, frame_count, samples, vocabulary)
+            VALUES (?, ?, ?, ?)
+        ''', (
+            video_id,
+            timeline['count'],
+            json.dumps(timeline['samples']),
+            json.dumps(timeline.get('vocabulary'))
+        ))
+        cursor.executemany('''
+            INSERT INTO behavior_segments
+            (video_id, component, state, start_frame, end_frame, start_ts, end_ts, start_index, end_index)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (video_id, component, *segment)
+            for component, segments in timeline['segments'].items()
+            for segment in segments
+        ])
     
     def get_all_videos(self):
-        cursor = self.conn.cursor()
+        with self.connections.read() as conn:
+            return self.connections.retry(self._get_all_videos, conn)
+
+    def _get_all_videos(self, conn):
+        cursor = conn.cursor()
         cursor.execute('''
             SELECT id, video_filename, upload_date, health_status, 
                    activity_status, saved_video_path, graphs_path
@@ -99,8 +727,79 @@ class DogHealthDB:
         ''')
         return cursor.fetchall()
     
+    # Keyset pagination: `cursor` is the next_cursor of the previous page, so
+    # every page is one index range scan no matter how deep it is
+    def get_videos_page(self, dog_id=None, cursor=None, limit=20):
+        with self.connections.read() as conn:
+            return self.connections.retry(lambda conn: self._get_videos_page(conn, dog_id, cursor, limit), conn)
+
+    def _get_videos_page(self, conn, dog_id, cursor, limit):
+        where, params = [], []
+        if dog_id is not None:
+            where.append('dog_id = ?')
+            params.append(dog_id)
+        if cursor:
+            upload_date, _, video_id = cursor.rpartition('|')
+            if not upload_date or not video_id.isdigit():
+                raise ValueError(f"Bad cursor: {cursor!r}")
+            where.append('(upload_date, id) < (?, ?)')
+            params.extend([upload_date, int(video_id)])
+
+        rows = conn.execute(f'''
+            SELECT {", ".join(VIDEO_LIST_COLUMNS)}
+            FROM videos
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY upload_date DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1]).fetchall()
+
+        videos = [dict(zip(VIDEO_LIST_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = f"{videos[-1]['upload_date']}|{videos[-1]['id']}"
+        return videos, next_cursor
+
+    def get_dog_summaries(self, cursor=None, limit=50):
+        with self.connections.read() as conn:
+            return self.connections.retry(lambda conn: self._get_dog_summaries(conn, cursor, limit), conn)
+
+    def _get_dog_summaries(self, conn, cursor, limit):
+        cur = conn.execute('''
+            SELECT * FROM dog_summaries
+            WHERE dog_id > ?
+            ORDER BY dog_id
+            LIMIT ?
+        ''', (cursor or '', limit + 1))
+        rows = self._summary_rows(cur)
+
+        dogs = rows[:limit]
+        return dogs, dogs[-1]['dog_id'] if len(rows) > limit else None
+
+    def get_dog_summary(self, dog_id):
+        with self.connections.read() as conn:
+            cur = self.connections.retry(
+                lambda conn: conn.execute('SELECT * FROM dog_summaries WHERE dog_id = ?', (dog_id,)), conn
+            )
+            rows = self._summary_rows(cur)
+        return rows[0] if rows else None
+
+    def _summary_rows(self, cur):
+        col_names = [description[0] for description in cur.description]
+        rows = []
+        for row in cur.fetchall():
+            summary = dict(zip(col_names, row))
+            count = summary.pop('mental_health_count')
+            total = summary.pop('mental_health_sum')
+            summary['average_mental_health_percent'] = round(total / count, 2) if count else None
+            rows.append(summary)
+        return rows
+
     def get_video_details(self, video_id):
-        cursor = self.conn.cursor()
+        with self.connections.read() as conn:
+            return self.connections.retry(lambda conn: self._get_video_details(conn, video_id), conn)
+
+    def _get_video_details(self, conn, video_id):
+        cursor = conn.cursor()
         
         # Get video info
         cursor.execute('SELECT * FROM videos WHERE id = ?', (video_id,))
@@ -132,7 +831,48 @@ class DogHealthDB:
             })
         
         video_dict['frame_data'] = frame_data
+        video_dict['timeline'] = self._get_timeline(conn, video_id)
         return video_dict
+
+    def get_timeline(self, video_id):
+        with self.connections.read() as conn:
+            return self.connections.retry(lambda conn: self._get_timeline(conn, video_id), conn)
+
+    def _get_timeline(self, conn, video_id):
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT frame_count, samples, vocabulary
+            FROM video_timelines
+            WHERE video_id = ?
+        ''', (video_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        cursor.execute('''
+            SELECT component, state, start_frame, end_frame, start_ts, end_ts, start_index, end_index
+            FROM behavior_segments
+            WHERE video_id = ?
+            ORDER BY component, start_index
+        ''', (video_id,))
+
+        segments = {}
+        for component, *segment in cursor.fetchall():
+            segments.setdefault(component, []).append(segment)
+
+        return {
+            'count': row[0],
+            'samples': json.loads(row[1]),
+            'vocabulary': json.loads(row[2]) if row[2] else None,
+            'segments': segments
+        }
+
+    def iter_video_frames(self, video_id, start=0, stop=None):
+        # Per-frame records expanded lazily from the stored segments
+        timeline = self.get_timeline(video_id)
+        if timeline is None:
+            return iter(())
+        return iter_frames(timeline, start, stop)
     
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        self.connections.close()
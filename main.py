@@ -1,105 +1,71 @@
 import os
 from dotenv import load_dotenv
 from ultralytics import YOLO
-from openai import OpenAI
-from elevenlabs.client import ElevenLabs
-from collections import Counter
 
-from utils.settings import landmarks, device, video_path, model
-from services.TailAnalysis import TailAnalysis
-from services.EarAnalysis import EarAnalysis
-from services.HeadAnalysis import HeadAnalysis
-from services.PostureAnalyzer import PostureAnalysis
+from utils.settings import landmarks, device, video_path, model_weights
+from utils.settings import sampling_mode, sample_fps, frame_stride, sample_count, max_frames
+from utils.settings import inference_batch_size, inference_imgsz
+from services.FrameSampler import FrameSampler
+from services.PoseInference import PoseInference
+from services.PoseLayout import PoseLayout, PoseBuffer
+from services.BatchAnalysis import BatchAnalysis
+from services.StateVocabulary import STATE_VOCABULARY
+from services.Providers import get_providers
+from services.DogHealthAnalyzer import LLM_MODEL, LLM_BASE_URL, TTS_BASE_URL, SEARCH_BASE_URL
+from services.DogHealthAnalyzer import TTS_MODEL_ID, TTS_OUTPUT_FORMAT, TTS_VOICE_SETTINGS, POST_PROCESS_TIMEOUTS
 
 # ===================== CONFIG =====================
-MAX_FRAMES = 100
 VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
 
 # ===================== ENV =====================
 load_dotenv()
 NOVITA_KEY = os.getenv("NOVITA_KEY")
 ELEVEN_KEY = os.getenv("ELEVAN_LAB")
+TAVILY_KEY = os.getenv("TAVILY")
 
-llm_client = OpenAI(api_key=NOVITA_KEY, base_url="https://api.novita.ai/openai")
-tts_client = ElevenLabs(api_key=ELEVEN_KEY)
+providers = get_providers(
+    llm_key=NOVITA_KEY, tts_key=ELEVEN_KEY, search_key=TAVILY_KEY,
+    llm_base_url=os.getenv("LLM_BASE_URL", LLM_BASE_URL),
+    tts_base_url=os.getenv("TTS_BASE_URL", TTS_BASE_URL),
+    search_base_url=os.getenv("SEARCH_BASE_URL", SEARCH_BASE_URL)
+)
 
 # ===================== ANALYZERS =====================
-tail_analyzer = TailAnalysis()
-ear_analyzer = EarAnalysis()
-head_analyzer = HeadAnalysis()
-posture_analyzer = PostureAnalysis()
-
-# ===================== COLLECTORS =====================
-tail_states = []
-ear_states = []
-head_states = []
-posture_states = []
+# Landmark indices are resolved once; analysis runs over the whole clip at once
+layout = PoseLayout(landmarks)
+batch_analyzer = BatchAnalysis(layout)
 
 print("🐕 Starting DOG HEALTH ANALYSIS...")
 
-# ===================== YOLO =====================
-results = model.predict(source=video_path, device=device, save=False, show=False)
+# ===================== SAMPLER =====================
+# Only sampled frames are decoded and sent through YOLO
+sampler = FrameSampler(
+    mode=sampling_mode, target_fps=sample_fps, stride=frame_stride,
+    count=sample_count, max_frames=max_frames
+)
+pose = PoseInference(YOLO(model_weights), device, batch_size=inference_batch_size, imgsz=inference_imgsz)
 
 # ===================== MAIN LOOP =====================
-for idx, data in enumerate(results):
-
-    if idx >= MAX_FRAMES:
-        print(f"🛑 Stopped at frame {idx} (analysis limit)")
-        break
-
-    if data.keypoints is None or len(data.keypoints.xy) == 0:
-        tail_analyzer.reset()
-        posture_analyzer.reset()
-        continue
-
-    data_keypts = data.keypoints.xy[0].cpu().numpy()
-
-    # -------- INIT --------
-    TAIL_START = TAIL_END = None
-    LEFT_EAR_BASE = LEFT_EAR_TIP = None
-    RIGHT_EAR_BASE = RIGHT_EAR_TIP = None
-    NOSE = CHIN = LEFT_EYE = RIGHT_EYE = None
-    THROAT = WITHERS = None
-    REAR_KNEE = None
-
-    # -------- MAP --------
-    for i, (x, y) in enumerate(data_keypts):
-        point = (int(x), int(y))
-        name = landmarks[i]
-
-        if name == "tail_start": TAIL_START = point
-        elif name == "tail_end": TAIL_END = point
-        elif name == "left_ear_base": LEFT_EAR_BASE = point
-        elif name == "left_ear_tip": LEFT_EAR_TIP = point
-        elif name == "right_ear_base": RIGHT_EAR_BASE = point
-        elif name == "right_ear_tip": RIGHT_EAR_TIP = point
-        elif name == "nose": NOSE = point
-        elif name == "chin": CHIN = point
-        elif name == "left_eye": LEFT_EYE = point
-        elif name == "right_eye": RIGHT_EYE = point
-        elif name == "throat": THROAT = point
-        elif name == "withers": WITHERS = point
-        elif name in ["rear_left_knee", "rear_right_knee"]: REAR_KNEE = point
-
-    # -------- ANALYSIS --------
-    tail_status, _, _ = tail_analyzer.tail_movement(TAIL_START, TAIL_END)
-    ear_result = ear_analyzer.analyze(LEFT_EAR_BASE, LEFT_EAR_TIP, RIGHT_EAR_BASE, RIGHT_EAR_TIP)
-    head_result = head_analyzer.analyze(NOSE, CHIN, LEFT_EYE, RIGHT_EYE, THROAT, WITHERS)
-    posture_result = posture_analyzer.analyze(WITHERS, REAR_KNEE)
-
-    tail_states.append(tail_status)
-    ear_states.append(ear_result["state"])
-    head_states.append(head_result["state"])
-    posture_states.append(posture_result["state"])
+poses = PoseBuffer(layout.num_keypoints, capacity=max_frames or 256)
 
-# ===================== SUMMARY ENGINE =====================
-def most_common(lst):
-    return Counter(lst).most_common(1)[0][0] if lst else "unknown"
+for idx, timestamp, data_keypts in pose.run(sampler.frames(video_path)):
+    poses.append(idx, timestamp, data_keypts)
+
+# ===================== ANALYSIS =====================
+analysis = batch_analyzer.analyze(poses.data)
+detected = analysis["detected"]
 
-tail_summary = most_common(tail_states)
-ear_summary = most_common(ear_states)
-head_summary = most_common(head_states)
-posture_summary = most_common(posture_states)
+# uint8 state codes; labels are only looked up for the summary text
+tail_states = analysis["tail"][detected]
+ear_states = analysis["ears"][detected]
+head_states = analysis["head"][detected]
+posture_states = analysis["posture"][detected]
+
+# ===================== SUMMARY ENGINE =====================
+tail_summary = STATE_VOCABULARY["tail"].most_common(tail_states)
+ear_summary = STATE_VOCABULARY["ears"].most_common(ear_states)
+head_summary = STATE_VOCABULARY["head"].most_common(head_states)
+posture_summary = STATE_VOCABULARY["posture"].most_common(posture_states)
 
 behavior_profile = f"""
 Tail: {tail_summary}
@@ -130,39 +96,33 @@ Rules:
 - Include health, activity, and recommendation
 """
 
-    response = llm_client.chat.completions.create(
-        model="deepseek/deepseek-v3.2",
+    summary = providers.run(providers.llm.chat(
+        model=LLM_MODEL,
         messages=[
             {"role": "system", "content": "You are an experienced veterinary doctor."},
             {"role": "user", "content": prompt}
         ],
         max_tokens=60,
         temperature=0.4
-    )
+    ), timeout=POST_PROCESS_TIMEOUTS["doctor_summary"])
 
-    return response.choices[0].message.content.strip()
+    return summary.strip()
 
 doctor_line = get_doctor_summary(behavior_profile)
 print("\n🩺 AI DOCTOR SAYS →", doctor_line)
 
 # ===================== TTS =====================
 def generate_doctor_voice(text, output_path):
-    audio = tts_client.text_to_speech.convert(
+    audio = providers.run(providers.tts.speak(
         text=text,
         voice_id=VOICE_ID,
-        model_id="eleven_multilingual_v2",
-        output_format="mp3_44100_128",
-        voice_settings={
-            "stability": 0.4,
-            "similarity_boost": 0.6,
-            "style": 0.6,
-            "use_speaker_boost": True
-        }
-    )
+        model_id=TTS_MODEL_ID,
+        output_format=TTS_OUTPUT_FORMAT,
+        voice_settings=TTS_VOICE_SETTINGS
+    ), timeout=POST_PROCESS_TIMEOUTS["doctor_voice"])
 
     with open(output_path, "wb") as f:
-        for chunk in audio:
-            f.write(chunk)
+        f.write(audio)
 
 # ===================== GENERATE FINAL MP3 =====================
 summary_audio_path = "final_dog_health_summary.mp3"
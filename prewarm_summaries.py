@@ -0,0 +1,63 @@
+import time
+import argparse
+import itertools
+
+from services.AnalysisWorker import build_default_analyzer
+from services.TailAnalysis import TAIL_LABELS
+from services.EarAnalysis import EAR_LABELS
+from services.HeadAnalysis import HEAD_LABELS
+from services.PostureAnalyzer import POSTURE_LABELS
+
+# ===================== CLI =====================
+# Fills the doctor summary cache for the behavior profiles uploads can
+# produce, so they don't wait on the LLM. Each new profile is one paid LLM
+# call, hence the default limit:
+#   python prewarm_summaries.py [--limit N]   (--limit 0: every profile)
+parser = argparse.ArgumentParser(description="Pre-generate AI doctor summaries for possible behavior profiles")
+parser.add_argument("--limit", type=int, default=200, help="stop after N new summaries (0: no limit)")
+args = parser.parse_args()
+
+# ===================== PROFILES =====================
+# Profiles only count frames with a dog, and every keypoint of a detected
+# dog has coordinates: the head always has its up/down part (codes
+# up_down * 6 + ..., up_down >= 1), the ears always have a position, and
+# the tail's "" code only marks frames without a dog. That leaves
+# 4 x 6 x 18 x 9 profiles. "First frame" only wins in very choppy clips, so
+# it goes last.
+REACHABLE = {
+    "tail": TAIL_LABELS[2:].tolist() + [TAIL_LABELS[1]],
+    "ears": [label for label in EAR_LABELS if label != "Unknown"],
+    "head": HEAD_LABELS[6:].tolist(),
+    "posture": POSTURE_LABELS.tolist()
+}
+
+profiles = list(itertools.product(
+    REACHABLE["tail"], REACHABLE["ears"], REACHABLE["head"], REACHABLE["posture"]
+))
+# Videos where no dog was ever detected
+profiles.append(("unknown", "unknown", "unknown", "unknown"))
+
+analyzer = build_default_analyzer()
+cache = analyzer.summary_cache
+
+print(f"🧾 {len(profiles)} possible profiles, {len(cache)} summaries already cached")
+
+# ===================== WARM =====================
+start = time.perf_counter()
+created = 0
+
+for tail, ears, head, posture in profiles:
+    profile = analyzer._format_behavior_profile(tail, ears, head, posture)
+    if cache.get(profile) is not None:
+        continue
+
+    analyzer._get_doctor_summary(profile)
+    created += 1
+
+    if created % 50 == 0:
+        print(f"  … {created} new summaries ({time.perf_counter() - start:.0f}s)")
+
+    if args.limit and created >= args.limit:
+        break
+
+print(f"\n✅ Added {created} summaries in {time.perf_counter() - start:.1f}s ({len(cache)} cached)")
@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+from services.JobQueue import build_default_analyzer
+from services.KeypointCache import KeypointCache
+from utils.settings import keypoint_cache_dir
+
+# ===================== CLI =====================
+# Re-scores every cached video from its stored keypoints (no YOLO, LLM or TTS):
+#   python replay.py [--cache-dir keypoint_cache] [--out results/replay.json] [files...]
+parser = argparse.ArgumentParser(description="Replay the behavior analyzers from cached keypoints")
+parser.add_argument("files", nargs="*", help="cache .npz files (default: every entry in the cache)")
+parser.add_argument("--cache-dir", default=keypoint_cache_dir)
+parser.add_argument("--out", default=os.path.join("results", "replay.json"))
+args = parser.parse_args()
+
+cache = KeypointCache(args.cache_dir)
+analyzer = build_default_analyzer()
+analyzer.keypoint_cache = cache
+
+paths = args.files or list(cache.entries())
+if not paths:
+    print(f"No cached keypoints found in {args.cache_dir}")
+    sys.exit(0)
+
+# ===================== REPLAY =====================
+start = time.perf_counter()
+report = []
+
+for path in paths:
+    result = analyzer.replay(path)
+    report.append({
+        "cache_file": path,
+        "video_path": result["meta"].get("video_path"),
+        "video_hash": result["meta"].get("video_hash"),
+        "frames": result["timeline"]["count"],
+        "behavior_profile": result["behavior_profile"],
+        "emotional_report": result["emotional_report"]
+    })
+
+elapsed = time.perf_counter() - start
+
+os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+with open(args.out, "w") as f:
+    json.dump(report, f, indent=4)
+
+print(f"\n✅ Replayed {len(report)} videos in {elapsed:.2f}s → {args.out}")
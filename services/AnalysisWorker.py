@@ -0,0 +1,74 @@
+import shutil
+import threading
+
+# =========================================================
+# WORKER ENTRY
+# =========================================================
+# Everything a job queue worker (thread or spawned process) runs. Kept free
+# of Flask and of the web app's setup: a spawned worker imports this module,
+# the analyzer services and utils.settings, nothing else.
+
+# Every worker owns its own analyzer, because the tail and posture analyzers
+# keep per-video state between frames. That includes its own YOLO model: the
+# Ultralytics predictor is stateful and not thread-safe.
+_worker_state = threading.local()
+
+
+def build_default_analyzer():
+    from ultralytics import YOLO
+    from utils import settings
+    from services.DogHealthAnalyzer import DogHealthAnalyzer, LLM_MODEL, DOCTOR_PROMPT_VERSION
+    from services.FrameSampler import FrameSampler
+    from services.KeypointCache import KeypointCache
+    from services.SummaryCache import SummaryCache
+    from services.AudioCache import AudioCache
+
+    sampler = FrameSampler(
+        mode=settings.sampling_mode,
+        target_fps=settings.sample_fps,
+        stride=settings.frame_stride,
+        count=settings.sample_count,
+        max_frames=settings.max_frames
+    )
+    return DogHealthAnalyzer(
+        model=YOLO(settings.model_weights), landmarks=settings.landmarks, device=settings.device,
+        max_frames=settings.max_frames, sampler=sampler,
+        batch_size=settings.inference_batch_size, imgsz=settings.inference_imgsz,
+        keypoint_cache=KeypointCache(settings.keypoint_cache_dir), weights_path=settings.model_weights,
+        summary_cache=SummaryCache(settings.summary_cache_path, namespace=f"{LLM_MODEL}/v{DOCTOR_PROMPT_VERSION}"),
+        audio_cache=AudioCache(settings.tts_cache_dir, max_bytes=settings.tts_cache_max_mb * 1024 * 1024),
+        question_cache_ttl=settings.chatbot_cache_ttl_minutes * 60,
+        emotion_weights=settings.emotion_weights,
+        worry_thresholds=settings.worry_thresholds,
+        live_every=settings.live_score_every_frames,
+        live_window_seconds=settings.live_score_window_seconds,
+        provider_config={
+            "connect_timeout": settings.provider_connect_timeout,
+            "read_timeout": settings.provider_read_timeout,
+            "max_retries": settings.provider_max_retries,
+            "llm_concurrency": settings.llm_max_concurrency,
+            "tts_concurrency": settings.tts_max_concurrency,
+            "search_concurrency": settings.search_max_concurrency
+        }
+    )
+
+
+def init_worker(analyzer_factory):
+    _worker_state.factory = analyzer_factory
+
+
+def run_analysis(video_path, output_dir, video_hash=None, result_cache=None, on_progress=None):
+    analyzer = getattr(_worker_state, "analyzer", None)
+    if analyzer is None:
+        analyzer = _worker_state.factory()
+        _worker_state.analyzer = analyzer
+
+    try:
+        result = analyzer.analyze_video(video_path, output_dir=output_dir, video_hash=video_hash,
+                                        on_progress=on_progress)
+        if result_cache is not None and video_hash:
+            result = result_cache.put(analyzer.result_key(video_hash), output_dir, result)
+    except Exception:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    return result
@@ -0,0 +1,89 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+
+
+def audio_key(text, voice_id, model_id, output_format, voice_settings):
+    key = json.dumps({
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "output_format": output_format,
+        "voice_settings": voice_settings
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, cache_dir="tts_cache", max_bytes=512 * 1024 ** 2, extension="mp3"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+
+    def get(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        # mtime doubles as the LRU clock
+        os.utime(path, None)
+        return path
+
+    def put(self, key, chunks):
+        path = self.path_for(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+        self.evict(keep=path)
+        return path
+
+    # Hard-links the cached audio into an analysis folder (copying across
+    # filesystems), so results never depend on a file the cache may evict.
+    def export(self, key, output_path):
+        path = self.get(key)
+        if path is None:
+            return None
+
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(path, output_path)
+        except OSError:
+            shutil.copyfile(path, output_path)
+        return output_path
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        suffix = f".{self.extension}"
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        # Least recently used first
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
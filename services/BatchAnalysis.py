@@ -0,0 +1,54 @@
+import numpy as np
+
+from services.TailAnalysis import TailAnalysis
+from services.EarAnalysis import EarAnalysis
+from services.HeadAnalysis import HeadAnalysis
+from services.PostureAnalyzer import PostureAnalysis
+from services.PoseLayout import PoseLayout, X, Y
+from services.StateVocabulary import STATE_VOCABULARY
+
+
+class BatchAnalysis:
+    def __init__(self, landmarks):
+        self.layout = landmarks if isinstance(landmarks, PoseLayout) else PoseLayout(landmarks)
+
+    # =========================================================
+    # MAIN ENTRY
+    # =========================================================
+    # pose: (T, K, 2 or 3) array of x, y[, confidence] in landmark order,
+    # NaN rows for frames without a dog. Returns one STATE_VOCABULARY code
+    # per frame and component (0 = no dog).
+    def analyze(self, pose):
+        pose = np.asarray(pose)
+        lay = self.layout
+
+        # The per-frame analyzers work on int pixel coordinates
+        kp = np.trunc(pose[:, :, [X, Y]].astype(np.float64))
+        rear_knee = np.trunc(lay.rear_knee(pose).astype(np.float64))
+
+        tail_codes, tail_angles, tail_intensity = TailAnalysis.tail_movement_batch(
+            kp[:, lay.tail_start], kp[:, lay.tail_end]
+        )
+        ear_result = EarAnalysis.analyze_batch(
+            kp[:, lay.left_ear_base], kp[:, lay.left_ear_tip],
+            kp[:, lay.right_ear_base], kp[:, lay.right_ear_tip]
+        )
+        head_result = HeadAnalysis.analyze_batch(
+            kp[:, lay.nose], kp[:, lay.chin],
+            kp[:, lay.left_eye], kp[:, lay.right_eye],
+            kp[:, lay.throat], kp[:, lay.withers]
+        )
+        posture_result = PostureAnalysis.analyze_batch(kp[:, lay.withers], rear_knee)
+
+        detected = ~np.isnan(kp[:, 0, 0])
+
+        return {
+            "detected": detected,
+            "tail": STATE_VOCABULARY["tail"].from_analyzer(tail_codes, detected),
+            "tail_angle": tail_angles,
+            "tail_intensity": tail_intensity,
+            "ears": STATE_VOCABULARY["ears"].from_analyzer(ear_result["code"], detected),
+            "head": STATE_VOCABULARY["head"].from_analyzer(head_result["code"], detected),
+            "posture": STATE_VOCABULARY["posture"].from_analyzer(posture_result["code"], detected),
+            "withers_delta": posture_result["withers_delta"]
+        }
@@ -0,0 +1,105 @@
+import numpy as np
+
+from services.StateVocabulary import STATE_VOCABULARY
+from services.BehaviorSegments import STATE, START_INDEX, END_INDEX
+
+# Bump when the layout below changes; stored fingerprints of another
+# version are ignored
+FINGERPRINT_VERSION = 1
+
+# Transition matrices grow with the square of the vocabulary, so only
+# components with at most this many states get one (head gets its switch
+# rate only)
+MAX_TRANSITION_STATES = 10
+
+# Tail intensity is degrees of tail movement between sampled frames
+TAIL_INTENSITY_SCALE = 45.0
+TAIL_INTENSITY_PERCENTILES = (50, 90)
+
+COMPONENTS = tuple(STATE_VOCABULARY)
+
+
+def _layout():
+    blocks = []
+    for key in COMPONENTS:
+        blocks.append((f"{key}_histogram", len(STATE_VOCABULARY[key])))
+    for key in COMPONENTS:
+        if len(STATE_VOCABULARY[key]) <= MAX_TRANSITION_STATES:
+            blocks.append((f"{key}_transitions", len(STATE_VOCABULARY[key]) ** 2))
+    blocks.append(("switch_rates", len(COMPONENTS)))
+    blocks.append(("tail_intensity", 2 + len(TAIL_INTENSITY_PERCENTILES)))
+    return blocks
+
+
+# [(block name, size)] in vector order
+FINGERPRINT_LAYOUT = _layout()
+FINGERPRINT_SIZE = sum(size for _, size in FINGERPRINT_LAYOUT)
+
+
+def block_slice(name):
+    start = 0
+    for block, size in FINGERPRINT_LAYOUT:
+        if block == name:
+            return slice(start, start + size)
+        start += size
+    raise KeyError(name)
+
+
+# All zeros when unknown, e.g. fingerprints backfilled from stored timelines;
+# similarity search compares those only with each other (see SimilarityIndex)
+TAIL_INTENSITY_BLOCK = block_slice("tail_intensity")
+
+
+# =========================================================
+# FINGERPRINT
+# =========================================================
+# A fixed-length float32 vector per analysis, built from its segments
+# (timeline["segments"], timeline["count"]):
+#   - per component, the share of frames in each state
+#   - per small component, the share of each state -> state transition
+#   - per component, state changes per sampled frame
+#   - tail intensity mean, std and percentiles (zeros when unknown)
+# Histograms and transitions are stored as square roots, so the Euclidean
+# distance between two fingerprints is the Hellinger distance between
+# their distributions.
+def behavior_fingerprint(segments, count, tail_intensity=None):
+    parts = []
+
+    for key in COMPONENTS:
+        histogram = np.zeros(len(STATE_VOCABULARY[key]))
+        for segment in segments.get(key, []):
+            histogram[int(segment[STATE])] += segment[END_INDEX] - segment[START_INDEX] + 1
+        parts.append(np.sqrt(histogram / max(count, 1)))
+
+    for key in COMPONENTS:
+        size = len(STATE_VOCABULARY[key])
+        if size > MAX_TRANSITION_STATES:
+            continue
+        states = [int(segment[STATE]) for segment in segments.get(key, [])]
+        transitions = np.zeros((size, size))
+        # Consecutive segments always differ in state
+        np.add.at(transitions, (states[:-1], states[1:]), 1)
+        total = transitions.sum()
+        parts.append(np.sqrt(transitions.ravel() / total) if total else transitions.ravel())
+
+    parts.append(np.array([
+        (len(segments.get(key, [])) - 1) / (count - 1) if count > 1 and segments.get(key) else 0.0
+        for key in COMPONENTS
+    ]))
+
+    parts.append(_tail_intensity_stats(tail_intensity))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def _tail_intensity_stats(tail_intensity):
+    size = 2 + len(TAIL_INTENSITY_PERCENTILES)
+    if tail_intensity is None:
+        return np.zeros(size)
+
+    values = np.asarray(tail_intensity, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.zeros(size)
+
+    stats = [values.mean(), values.std(), *np.percentile(values, TAIL_INTENSITY_PERCENTILES)]
+    return np.array(stats) / TAIL_INTENSITY_SCALE
@@ -0,0 +1,196 @@
+import numpy as np
+
+# Segment fields: [state, start_frame, end_frame, start_ts, end_ts, start_index, end_index]
+# start/end are inclusive; *_index count sampled frames from 0.
+STATE, START_FRAME, END_FRAME, START_TS, END_TS, START_INDEX, END_INDEX = range(7)
+
+TIMESTAMP_DECIMALS = 3
+
+
+# =========================================================
+# SAMPLE POSITIONS
+# =========================================================
+# Sampled frame ids and timestamps are (piecewise) arithmetic sequences, so
+# they are stored as [start, step, count] runs instead of one value per frame.
+def arithmetic_runs(values, atol=0.0):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return []
+
+    # Candidate runs end where the step changes by more than atol
+    breaks = np.flatnonzero(np.abs(np.diff(np.diff(values))) > atol) + 1
+    runs = []
+    i = 0
+    for j in breaks.tolist() + [n - 1]:
+        if j >= i:
+            runs.extend(_fit_runs(values, i, j, atol))
+            i = j + 1
+    return runs
+
+
+# Splits values[i..j] until each piece is within atol of a straight line,
+# so small per-step differences can't add up along a long run
+def _fit_runs(values, i, j, atol):
+    if i == j:
+        return [[values[i].item(), 0.0, 1]]
+
+    step = (values[j] - values[i]) / (j - i)
+    error = np.abs(values[i:j + 1] - (values[i] + step * np.arange(j - i + 1))).max()
+    if error <= atol:
+        return [[values[i].item(), step.item(), j - i + 1]]
+
+    mid = (i + j) // 2
+    return _fit_runs(values, i, mid, atol) + _fit_runs(values, mid + 1, j, atol)
+
+
+def expand_runs(runs, start=0, stop=None, decimals=None):
+    counts = np.array([run[2] for run in runs], dtype=np.int64)
+    ends = np.cumsum(counts)
+    total = int(ends[-1]) if len(ends) else 0
+    stop = total if stop is None else min(stop, total)
+
+    # Only the runs overlapping [start, stop) are expanded
+    out = []
+    for k in range(int(np.searchsorted(ends, start, side="right")), len(runs)):
+        run_start = int(ends[k] - counts[k])
+        if run_start >= stop:
+            break
+        lo, hi = max(start - run_start, 0), min(stop - run_start, int(counts[k]))
+        out.append(runs[k][0] + runs[k][1] * np.arange(lo, hi))
+
+    values = np.concatenate(out) if out else np.zeros(0)
+    return np.round(values, decimals) if decimals is not None else values
+
+
+class RunEncoder:
+    # Incremental arithmetic_runs: chunks can arrive one at a time. Runs are
+    # fitted to atol / 2 and only merged across chunks while the merged line
+    # stays within another atol / 2, so every value stays within atol.
+    def __init__(self, atol=0.0):
+        self.atol = atol
+        self.runs = []
+
+    def add(self, values):
+        runs = arithmetic_runs(values, self.atol / 2)
+        if runs and self.runs and self._merge(self.runs[-1], runs[0]):
+            runs.pop(0)
+        self.runs.extend(runs)
+
+    def _merge(self, last, first):
+        count = last[2]
+        step = first[0] - last[0] if count == 1 else last[1]
+        start_error = abs(last[0] + step * count - first[0])
+        end_error = abs(last[0] + step * (count + first[2] - 1) - (first[0] + first[1] * (first[2] - 1)))
+        if max(start_error, end_error) > self.atol / 2:
+            return False
+
+        last[1] = step
+        last[2] += first[2]
+        return True
+
+
+# =========================================================
+# BUILD
+# =========================================================
+class SegmentBuilder:
+    # Run-length encodes per-frame state codes as they are produced. Chunks
+    # can be of any size; a run still open at the end of a chunk continues
+    # into the next one. Work and output scale with the number of state
+    # changes, not with the number of frames.
+    def __init__(self, components):
+        self.components = tuple(components)
+        self.count = 0
+        self.segments = {key: [] for key in self.components}
+        self.frames = RunEncoder()
+        # Expanded timestamps stay within half a millisecond of the originals
+        self.timestamps = RunEncoder(atol=0.5 * 10 ** -TIMESTAMP_DECIMALS)
+
+    def add(self, frames, timestamps, codes):
+        frames = np.asarray(frames, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        n = len(frames)
+        if n == 0:
+            return
+
+        self.frames.add(frames)
+        self.timestamps.add(timestamps)
+
+        for key in self.components:
+            states = np.asarray(codes[key])
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(states)) + 1))
+            ends = np.append(starts[1:] - 1, n - 1)
+
+            segments = self.segments[key]
+            for s, e in zip(starts.tolist(), ends.tolist()):
+                state = int(states[s])
+                if s == 0 and segments and segments[-1][STATE] == state and segments[-1][END_INDEX] == self.count - 1:
+                    # Same state across the chunk boundary
+                    last = segments[-1]
+                    last[END_FRAME], last[END_TS], last[END_INDEX] = int(frames[e]), self._ts(timestamps[e]), self.count + e
+                    continue
+                segments.append([
+                    state, int(frames[s]), int(frames[e]),
+                    self._ts(timestamps[s]), self._ts(timestamps[e]),
+                    self.count + s, self.count + e
+                ])
+
+        self.count += n
+
+    def _ts(self, value):
+        return round(float(value), TIMESTAMP_DECIMALS)
+
+    def to_json(self, vocabulary=None):
+        data = {
+            "count": self.count,
+            "samples": {
+                # Frame runs are fitted exactly, so start and step are whole numbers
+                "frames": [[int(start), int(step), count] for start, step, count in self.frames.runs],
+                "timestamps": self.timestamps.runs
+            },
+            "segments": self.segments
+        }
+        if vocabulary is not None:
+            data["vocabulary"] = vocabulary
+        return data
+
+
+# =========================================================
+# EXPAND (only when per-frame data is actually needed)
+# =========================================================
+def expand_codes(segments, start=0, stop=None):
+    if not segments:
+        return np.zeros(0, dtype=np.uint16)
+
+    seg = np.asarray(segments, dtype=np.float64)
+    lengths = (seg[:, END_INDEX] - seg[:, START_INDEX] + 1).astype(np.int64)
+    count = int(seg[-1, END_INDEX]) + 1
+    stop = count if stop is None else min(stop, count)
+    if start >= stop:
+        return np.zeros(0, dtype=np.uint16)
+
+    # Only the segments overlapping [start, stop) are expanded
+    first = np.searchsorted(seg[:, END_INDEX], start)
+    last = np.searchsorted(seg[:, START_INDEX], stop - 1, side="right")
+    codes = np.repeat(seg[first:last, STATE].astype(np.uint16), lengths[first:last])
+    offset = start - int(seg[first, START_INDEX])
+    return codes[offset:offset + stop - start]
+
+
+def iter_frames(timeline, start=0, stop=None, batch=1024):
+    # Yields one {"frame", "timestamp", <component>: code} record per sampled
+    # frame, expanding `batch` frames at a time
+    count = timeline["count"]
+    stop = count if stop is None else min(stop, count)
+    components = list(timeline["segments"])
+
+    for lo in range(start, stop, batch):
+        hi = min(lo + batch, stop)
+        frames = expand_runs(timeline["samples"]["frames"], lo, hi).astype(np.int64).tolist()
+        times = expand_runs(timeline["samples"]["timestamps"], lo, hi, TIMESTAMP_DECIMALS).tolist()
+        codes = [expand_codes(timeline["segments"][key], lo, hi).tolist() for key in components]
+
+        for row in zip(frames, times, *codes):
+            record = {"frame": row[0], "timestamp": row[1]}
+            record.update(zip(components, row[2:]))
+            yield record
@@ -1,245 +1,461 @@
 import os
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from collections import Counter, defaultdict
-import matplotlib.pyplot as plt
-from openai import OpenAI
-from elevenlabs.client import ElevenLabs
-from tavily import TavilyClient
-from services.TailAnalysis import TailAnalysis
-from services.EarAnalysis import EarAnalysis
-from services.HeadAnalysis import HeadAnalysis
-from services.PostureAnalyzer import PostureAnalysis
+from services.BatchAnalysis import BatchAnalysis
+from services.StateVocabulary import STATE_VOCABULARY
+from services.BehaviorSegments import SegmentBuilder
+from services.EmotionRules import EmotionRules, emotional_report
+from services.EmotionAccumulator import EmotionAccumulator
+from services.BehaviorFingerprint import behavior_fingerprint
+from services.PoseLayout import PoseLayout, PoseBuffer
+from services.FrameSampler import FrameSampler
+from services.PoseInference import PoseInference
+from services.KeypointCache import KeypointCache, file_hash
+from services.AudioCache import audio_key
+from services.TaskGraph import TaskGraph
+from services.TTLCache import TTLCache, normalize_question
+from services.Providers import get_providers
+
+# Bump whenever the analyzers, scoring or report format change, so cached
+# results from older code are not served.
+ANALYZER_VERSION = 6
+
+COMPONENTS = ("tail", "ears", "head", "posture")
+
+LLM_MODEL = "deepseek/deepseek-v3.2"
+LLM_BASE_URL = "https://api.novita.ai/openai"
+TTS_BASE_URL = "https://api.elevenlabs.io"
+SEARCH_BASE_URL = "https://api.tavily.com"
+# Bump when the doctor summary prompt changes, so cached summaries are not reused
+DOCTOR_PROMPT_VERSION = 1
+
+TTS_MODEL_ID = "eleven_multilingual_v2"
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+TTS_VOICE_SETTINGS = {
+    "stability": 0.4,
+    "similarity_boost": 0.6,
+    "style": 0.6,
+    "use_speaker_boost": True
+}
+
+# Per-step timeouts (seconds) for the post-inference stage. Provider calls
+# get the same deadline, so a step that times out doesn't keep its thread.
+POST_PROCESS_TIMEOUTS = {
+    "emotional_report": 30,
+    "doctor_summary": 45,
+    "doctor_voice": 90,
+    "timeline": 30,
+    "fingerprint": 30
+}
+
+# Deadlines (seconds) for the chatbot's provider calls, retries included
+QUESTION_TIMEOUTS = {
+    "search": 20,
+    "answer": 45
+}
 
 
 class DogHealthAnalyzer:
-    def __init__(self, model, landmarks, device, max_frames=100, voice_id="JBFqnCBsd6RMkjVDRZzb"):
+    def __init__(self, model, landmarks, device, max_frames=600, voice_id="JBFqnCBsd6RMkjVDRZzb", sampler=None,
+                 batch_size=8, imgsz=640, keypoint_cache=None, weights_path=None, summary_cache=None,
+                 audio_cache=None, question_cache_ttl=3600, provider_config=None,
+                 emotion_weights=None, worry_thresholds=None, live_every=32, live_window_seconds=10.0):
         self.model = model
         self.landmarks = landmarks
         self.device = device
         self.max_frames = max_frames
         self.voice_id = voice_id
+        self.sampler = sampler or FrameSampler(max_frames=max_frames)
+        self.pose = PoseInference(model, device, batch_size=batch_size, imgsz=imgsz)
+        self.keypoint_cache = keypoint_cache
+        self.weights_path = weights_path or getattr(model, "ckpt_path", None)
+        self._model_version = None
+        self.summary_cache = summary_cache
+        self.audio_cache = audio_cache
 
         # ===== ENV =====
         load_dotenv()
         self.novita_key = os.getenv("NOVITA_KEY")
         self.eleven_key = os.getenv("ELEVAN_LAB")
         self.tavily_key = os.getenv("TAVILY")   
-        self.tavily_client = TavilyClient(api_key=self.tavily_key)
 
-        self.llm_client = OpenAI(api_key=self.novita_key, base_url="https://api.novita.ai/openai")
-        self.tts_client = ElevenLabs(api_key=self.eleven_key)
+        # ===== PROVIDERS =====
+        # Pooled keep-alive async clients shared by every analyzer in the
+        # process. *_BASE_URL env vars point them at stub_providers.py in tests.
+        self.providers = get_providers(
+            llm_key=self.novita_key,
+            tts_key=self.eleven_key,
+            search_key=self.tavily_key,
+            llm_base_url=os.getenv("LLM_BASE_URL", LLM_BASE_URL),
+            tts_base_url=os.getenv("TTS_BASE_URL", TTS_BASE_URL),
+            search_base_url=os.getenv("SEARCH_BASE_URL", SEARCH_BASE_URL),
+            **(provider_config or {})
+        )
+
+        # ===== CHATBOT CACHES =====
+        # Keyed by the normalized question; identical questions in flight share one upstream call
+        self.search_cache = TTLCache(ttl_seconds=question_cache_ttl)
+        self.answer_cache = TTLCache(ttl_seconds=question_cache_ttl)
 
         # ===== ANALYZERS =====
-        self.tail_analyzer = TailAnalysis()
-        self.ear_analyzer = EarAnalysis()
-        self.head_analyzer = HeadAnalysis()
-        self.posture_analyzer = PostureAnalysis()
+        self.layout = PoseLayout(landmarks)
+        self.batch_analyzer = BatchAnalysis(self.layout)
+
+        # ===== EMOTIONAL SCORING =====
+        self.emotion_rules = EmotionRules()
+        self.emotion_weights = emotion_weights
+        self.worry_thresholds = worry_thresholds
+        # Live scores while a video is still being processed
+        self.live_every = live_every
+        self.live_window_seconds = live_window_seconds
+
+        # ===== POST-PROCESSING =====
+        self.post_executor = ThreadPoolExecutor(max_workers=4)
 
     # =========================================================
     # MAIN ENTRY
     # =========================================================
-    def analyze_video(self, video_path, output_dir="results"):
+    # on_progress, if given, is called with an EmotionAccumulator snapshot
+    # every live_every frames while the video is being processed.
+    def analyze_video(self, video_path, output_dir="results", video_hash=None, on_progress=None):
         print("🐕 Starting DOG HEALTH ANALYSIS...")
 
         os.makedirs(output_dir, exist_ok=True)
 
-        per_frame_data = []
-        state_history = {
-            "tail": [],
-            "ears": [],
-            "head": [],
-            "posture": []
+        poses = self._load_or_infer_poses(video_path, video_hash, on_progress)
+        states = self._analyze_poses(poses)
+        history = self._state_history(states)
+
+        timeline_path = os.path.join(output_dir, "timeline.json")
+        audio_path = os.path.join(output_dir, "ai_doctor_summary.mp3")
+
+        behavior_profile = self._build_behavior_profile(history)
+        print("\n📊 Behavior Profile:\n", behavior_profile)
+
+        # ===== POST-PROCESSING GRAPH =====
+        # LLM -> TTS waits on the network while the report, JSON and graphs
+        # are computed locally, so they overlap instead of running in turn.
+        graph = TaskGraph(executor=self.post_executor)
+        graph.add("emotional_report", lambda: self._emotional_report(history),
+                  timeout=POST_PROCESS_TIMEOUTS["emotional_report"])
+        graph.add("doctor_summary", lambda: self._get_doctor_summary(behavior_profile),
+                  timeout=POST_PROCESS_TIMEOUTS["doctor_summary"])
+        graph.add("doctor_voice", lambda doctor_summary: self._generate_doctor_voice(doctor_summary, audio_path),
+                  deps=["doctor_summary"], timeout=POST_PROCESS_TIMEOUTS["doctor_voice"])
+        graph.add("timeline", lambda: self._save_timeline(states, timeline_path),
+                  timeout=POST_PROCESS_TIMEOUTS["timeline"])
+        graph.add("fingerprint", lambda: self._fingerprint(states),
+                  timeout=POST_PROCESS_TIMEOUTS["fingerprint"])
+
+        stage = graph.run()
+        self._print_stage_report(stage)
+
+        if stage["errors"]:
+            name, error = next(iter(stage["errors"].items()))
+            raise RuntimeError(f"Post-processing step '{name}' failed: {error}") from error
+
+        results = stage["results"]
+        print("\n🧠 Emotional & Mental Health Report:\n", results["emotional_report"])
+        print("\n🩺 AI DOCTOR SAYS →", results["doctor_summary"])
+        print(f"🔊 Voice summary saved at: {audio_path}")
+
+        return {
+            "behavior_profile": behavior_profile,
+            "doctor_summary": results["doctor_summary"],
+            "emotional_report": results["emotional_report"],
+            "audio_path": audio_path,
+            "timeline": timeline_path,
+            "fingerprint": results["fingerprint"]
         }
 
-        results = self.model.predict(source=video_path, device=self.device, save=False, show=False)
+    # Behavior as run-length segments per component (see BehaviorSegments),
+    # with the vocabulary and sample positions needed to expand them back
+    # to frames. Served to the browser for the charts and stored in the DB.
+    def _save_timeline(self, states, timeline_path):
+        with open(timeline_path, "w") as f:
+            json.dump(self._build_timeline(states), f, separators=(",", ":"))
 
-        for idx, data in enumerate(results):
+        print(f"📈 Timeline saved at: {timeline_path}")
+        return timeline_path
 
-            if idx >= self.max_frames:
-                print(f"🛑 Stopped at frame {idx} (analysis limit)")
-                break
+    def _build_timeline(self, states):
+        return states["segments"].to_json(vocabulary=self._vocabulary_json())
 
-            frame_record = {
-                "frame": idx,
-                "tail": "unknown",
-                "ears": "unknown",
-                "head": "unknown",
-                "posture": "unknown"
-            }
+    # Fixed-length behavior vector for similarity search (see BehaviorFingerprint)
+    def _fingerprint(self, states):
+        segments = states["segments"]
+        tail_intensity = states["tail_intensity"][states["detected"]]
+        return behavior_fingerprint(segments.segments, segments.count, tail_intensity).tolist()
 
-            if data.keypoints is None or len(data.keypoints.xy) == 0:
-                self.tail_analyzer.reset()
-                self.posture_analyzer.reset()
-                per_frame_data.append(frame_record)
-                continue
+    def _vocabulary_json(self):
+        return {key: STATE_VOCABULARY[key].labels.tolist() for key in COMPONENTS}
 
-            data_keypts = data.keypoints.xy[0].cpu().numpy()
-            points = self._map_keypoints(data_keypts)
+    def _print_stage_report(self, stage):
+        print(f"\n⏱️ Post-processing took {stage['total_seconds']:.2f}s "
+              f"(critical path: {' → '.join(stage['critical_path'])})")
+        for name, timing in sorted(stage["timings"].items(), key=lambda item: item[1]["start"]):
+            status = "failed" if name in stage["errors"] else "ok"
+            print(f"   {name:<18} {timing['start']:6.2f}s → {timing['end']:6.2f}s  ({status})")
 
-            # -------- ANALYSIS --------
-            tail_status, _, _ = self.tail_analyzer.tail_movement(points["TAIL_START"], points["TAIL_END"])
-            ear_result = self.ear_analyzer.analyze(
-                points["LEFT_EAR_BASE"], points["LEFT_EAR_TIP"],
-                points["RIGHT_EAR_BASE"], points["RIGHT_EAR_TIP"]
-            )
-            head_result = self.head_analyzer.analyze(
-                points["NOSE"], points["CHIN"],
-                points["LEFT_EYE"], points["RIGHT_EYE"],
-                points["THROAT"], points["WITHERS"]
-            )
-            posture_result = self.posture_analyzer.analyze(points["WITHERS"], points["REAR_KNEE"])
+    # =========================================================
+    # REPLAY
+    # =========================================================
+    # Re-runs the analyzers and scoring on cached keypoints, without YOLO,
+    # the LLM or TTS. Used to re-score stored videos after tuning thresholds.
+    def replay(self, cache_path):
+        cache = self.keypoint_cache or KeypointCache(os.path.dirname(cache_path) or ".")
+        poses = cache.load(cache_path)
+        if poses is None:
+            raise FileNotFoundError(f"No cached keypoints at: {cache_path}")
 
-            frame_record["tail"] = tail_status
-            frame_record["ears"] = ear_result["state"]
-            frame_record["head"] = head_result["state"]
-            frame_record["posture"] = posture_result["state"]
+        states = self._analyze_poses(poses)
+        history = self._state_history(states)
+
+        return {
+            "meta": cache.meta(cache_path),
+            "timeline": self._build_timeline(states),
+            "behavior_profile": self._build_behavior_profile(history),
+            "emotional_report": self._emotional_report(history)
+        }
 
-            per_frame_data.append(frame_record)
+    # =========================================================
+    # ANALYSIS
+    # =========================================================
+    # One entry per sampled frame: frame ids, timestamps, the detection mask
+    # and a uint8 STATE_VOCABULARY code array per component, plus the same
+    # states run-length encoded as segments.
+    def _analyze_poses(self, poses):
+        # -------- ANALYSIS (whole video at once) --------
+        analysis = self.batch_analyzer.analyze(poses.data)
+
+        states = {
+            "frames": poses.frames,
+            "timestamps": poses.times,
+            "detected": analysis["detected"]
+        }
+        for key in COMPONENTS:
+            states[key] = analysis[key]
+        states["tail_intensity"] = analysis["tail_intensity"]
 
-            state_history["tail"].append(tail_status)
-            state_history["ears"].append(ear_result["state"])
-            state_history["head"].append(head_result["state"])
-            state_history["posture"].append(posture_result["state"])
+        states["segments"] = SegmentBuilder(COMPONENTS)
+        states["segments"].add(poses.frames, poses.times, states)
+        return states
 
-        # ===== SAVE JSON =====
-        json_path = os.path.join(output_dir, "per_frame_behavior.json")
-        with open(json_path, "w") as f:
-            json.dump(per_frame_data, f, indent=4)
+    # Codes of the frames where a dog was found
+    def _state_history(self, states):
+        detected = states["detected"]
+        return {key: states[key][detected] for key in COMPONENTS}
 
-        print(f"📁 Per-frame JSON saved at: {json_path}")
+    # Rule masks over the whole code arrays at once (see EmotionRules)
+    def _emotional_report(self, history):
+        counts = self.emotion_rules.counts(history)
+        return emotional_report(counts, len(history["tail"]), self.emotion_weights, self.worry_thresholds)
 
-        # ===== SUMMARY =====
-        behavior_profile = self._build_behavior_profile(
-            state_history["tail"],
-            state_history["ears"],
-            state_history["head"],
-            state_history["posture"]
-        )
-        # ===== EMOTIONAL & MENTAL HEALTH ANALYSIS =====
-        emotional_report = self._analyze_emotional_health(
-            state_history["tail"],
-            state_history["ears"],
-            state_history["head"],
-            state_history["posture"]
+    # =========================================================
+    # INFERENCE
+    # =========================================================
+    def _load_or_infer_poses(self, video_path, video_hash=None, on_progress=None):
+        cache_path = None
+        if self.keypoint_cache is not None:
+            video_hash = video_hash or file_hash(video_path)
+            weights_hash = self.model_version()
+            cache_path = self.keypoint_cache.path_for(video_hash, weights_hash, self._inference_config())
+
+            poses = self.keypoint_cache.load(cache_path)
+            if poses is not None:
+                print(f"♻️ Reusing cached keypoints: {cache_path}")
+                return poses
+
+        poses = PoseBuffer(self.layout.num_keypoints, capacity=self.max_frames or 256)
+        live = self.new_accumulator() if on_progress is not None else None
+        scored = 0
+
+        for idx, timestamp, data_keypts in self._stream_keypoints(video_path):
+            poses.append(idx, timestamp, data_keypts)
+
+            if live is not None and poses.size - scored >= self.live_every:
+                scored = self._score_live(poses, scored, live, on_progress)
+
+        if live is not None and poses.size > scored:
+            self._score_live(poses, scored, live, on_progress)
+
+        if cache_path is not None:
+            self.keypoint_cache.save(cache_path, poses, {
+                "video_path": video_path,
+                "video_hash": video_hash,
+                "weights_hash": weights_hash,
+                "landmarks": self.layout.landmarks,
+                "inference": self._inference_config()
+            })
+        return poses
+
+    # Scores the frames appended since `start`. Tail and posture only look
+    # one frame back, so re-analyzing from start - 1 gives the same states
+    # as the final whole-video pass.
+    def _score_live(self, poses, start, live, on_progress):
+        lo = max(start - 1, 0)
+        analysis = self.batch_analyzer.analyze(poses.data[lo:])
+        skip = start - lo
+
+        live.update_batch(
+            poses.times[start:],
+            {key: analysis[key][skip:] for key in COMPONENTS},
+            analysis["detected"][skip:]
         )
+        on_progress(live.snapshot())
+        return poses.size
+
+    def new_accumulator(self):
+        return EmotionAccumulator(self.emotion_rules, self.live_window_seconds,
+                                  self.emotion_weights, self.worry_thresholds)
+
+    def model_version(self):
+        # Weights don't change while the process runs; hash them once
+        if self._model_version is None:
+            if self.weights_path and os.path.exists(self.weights_path):
+                self._model_version = file_hash(self.weights_path)
+            else:
+                self._model_version = "unknown"
+        return self._model_version
+
+    def result_key(self, video_hash):
+        key = json.dumps({
+            "video": video_hash,
+            "model": self.model_version(),
+            "analyzer": ANALYZER_VERSION,
+            "inference": self._inference_config(),
+            "scoring": [self.emotion_weights, self.worry_thresholds]
+        }, sort_keys=True)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _inference_config(self):
+        return {
+            "sampler": self.sampler.config(),
+            "imgsz": self.pose.imgsz
+        }
 
-        print("\n🧠 Emotional & Mental Health Report:\n", emotional_report)
-
-        print("\n📊 Behavior Profile:\n", behavior_profile)
+    def _stream_keypoints(self, video_path):
+        # The sampler decodes only the frames we analyze (seeking over the
+        # rest) and PoseInference runs them in fixed-size batches, so at most
+        # one batch of frames and Results is alive at a time.
+        frames = self.sampler.frames(video_path)
 
-        # ===== LLM =====
-        doctor_line = self._get_doctor_summary(behavior_profile)
-        print("\n🩺 AI DOCTOR SAYS →", doctor_line)
+        try:
+            yield from self.pose.run(frames)
+        finally:
+            frames.close()
 
-        # ===== TTS =====
-        audio_path = os.path.join(output_dir, "ai_doctor_summary.mp3")
-        self._generate_doctor_voice(doctor_line, audio_path)
+    # =========================================================
+    # HELPERS
+    # =========================================================
+    def _common_question(self, query):
+        try:
+            return self.answer_cache.get_or_compute(
+                normalize_question(query),
+                lambda: self._answer_question(query)
+            )
 
-        print(f"🔊 Voice summary saved at: {audio_path}")
+        except Exception as e:
+            print(f"❌ Error in _common_question: {e}")
+            return "No results found due to error."
 
-        # ===== GRAPHS =====
-        graphs = self._generate_graphs(state_history, output_dir)
+    def _answer_question(self, query):
+        research_text = self._cached_research(query)
+        if research_text is None:
+            return "No relevant internet results found."
 
-        return {
-            "per_frame_json": json_path,
-            "behavior_profile": behavior_profile,
-            "doctor_summary": doctor_line,
-            "emotional_report": emotional_report,
-            "audio_path": audio_path,
-            "graphs": graphs
-        }
-    def _analyze_emotional_health(self, tail_states, ear_states, head_states, posture_states):
-        total = len(tail_states)
-        if total == 0:
-            return {}
-
-        score = {
-            "happy": 0,
-            "sad": 0,
-            "neutral": 0,
-            "active": 0,
-            "environment_stress": 0
-        }
+        answer = self.providers.run(self.providers.llm.chat(
+            model=LLM_MODEL,
+            messages=self._question_messages(query, research_text),
+            max_tokens=200,
+            temperature=0.4
+        ), timeout=QUESTION_TIMEOUTS["answer"])
 
-        for t, e, h, p in zip(tail_states, ear_states, head_states, posture_states):
+        return answer.strip()
 
-            # -------- HAPPY --------
-            if t in ["wagging_fast", "wagging"] and e == "forward" and h == "up":
-                score["happy"] += 1
+    # Same answer as _common_question, as (event, data) pairs: "searching"
+    # before the web search, "answering" and a "token" per LLM chunk, then
+    # "done" with the full answer (or "failed"; not "error", which is
+    # EventSource's own connection-error event). Identical questions asked
+    # while an answer is streaming share that one LLM stream.
+    def _stream_common_question(self, query):
+        yield "searching", query
 
-            # -------- SAD / STRESS --------
-            if t in ["tucked", "still"] and (e == "back" or h == "down"):
-                score["sad"] += 1
+        try:
+            found, result = self.answer_cache.stream(
+                normalize_question(query),
+                lambda: self._answer_events(query),
+                lambda events: "".join(data for event, data in events if event == "token").strip()
+            )
+            if found:
+                yield "done", result
+                return
 
-            # -------- NEUTRAL --------
-            if t == "still" and e == "neutral" and h == "neutral":
-                score["neutral"] += 1
+            parts = []
+            for event, data in result:
+                if event == "token":
+                    parts.append(data)
+                yield event, data
 
-            # -------- ACTIVITY --------
-            if p in ["running", "jumping", "playing", "walking"]:
-                score["active"] += 1
+            yield "done", "".join(parts).strip()
 
-            # -------- ENVIRONMENT IMPACT --------
-            if e == "back" or h == "down" or p == "crouching":
-                score["environment_stress"] += 1
+        except Exception as e:
+            print(f"❌ Error in _stream_common_question: {e}")
+            yield "failed", "No results found due to error."
 
-        # Convert to percentage
-        result = {k: round((v / total) * 100, 2) for k, v in score.items()}
+    def _answer_events(self, query):
+        research_text = self._cached_research(query)
+        if research_text is None:
+            yield "token", "No relevant internet results found."
+            return
 
-        # -------- Mental Health Score --------
-        # Simple weighted formula
-        mental_health = (
-            result["happy"] * 1.0 +
-            result["neutral"] * 0.6 -
-            result["sad"] * 0.8 -
-            result["environment_stress"] * 0.7
-        )
+        yield "answering", ""
 
-        mental_health = max(0, min(100, round(mental_health, 2)))
+        yield from (("token", token) for token in self.providers.iterate(self.providers.llm.chat_stream(
+            model=LLM_MODEL,
+            messages=self._question_messages(query, research_text),
+            max_tokens=200,
+            temperature=0.4
+        ), timeout=QUESTION_TIMEOUTS["answer"]))
 
-        # -------- Worry Detection --------
-        worry = "No immediate concern"
-        if result["sad"] > 40 or result["environment_stress"] > 35:
-            worry = "Yes, your dog may be stressed or uncomfortable"
+    def _cached_research(self, query):
+        return self.search_cache.get_or_compute(
+            normalize_question(query),
+            lambda: self._research_question(query)
+        )
 
+    def question_cache_stats(self):
         return {
-            "happy_percent": result["happy"],
-            "sad_percent": result["sad"],
-            "neutral_percent": result["neutral"],
-            "activity_percent": result["active"],
-            "environment_impact_percent": result["environment_stress"],
-            "mental_health_percent": mental_health,
-            "should_worry": worry
+            "search": self.search_cache.stats(),
+            "answer": self.answer_cache.stats()
         }
 
-    # =========================================================
-    # HELPERS
-    # =========================================================
-    def _common_question(self, query):
-        try:
-            response = self.tavily_client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=5
-            )
+    def _research_question(self, query):
+        response = self.providers.run(self.providers.search.search(
+            query=query,
+            search_depth="advanced",
+            max_results=5
+        ), timeout=QUESTION_TIMEOUTS["search"])
 
-            contents = []
+        contents = []
 
-            for item in response.get("results", []):
-                title = item.get("title", "No title")
-                content = item.get("content") or item.get("raw_content") or ""
-                content = content[:800]  # truncate to avoid token explosion
+        for item in response.get("results", []):
+            title = item.get("title", "No title")
+            content = item.get("content") or item.get("raw_content") or ""
+            content = content[:800]  # truncate to avoid token explosion
 
-                contents.append(f"Title: {title}\nContent: {content}")
+            contents.append(f"Title: {title}\nContent: {content}")
 
-            if not contents:
-                return "No relevant internet results found."
+        if not contents:
+            return None
 
-            # Join list into clean text
-            research_text = "\n\n".join(contents)
+        # Join list into clean text
+        return "\n\n".join(contents)
 
-            prompt = f"""You are an experienced veterinary doctor and canine behavior expert.
+    def _question_messages(self, query, research_text):
+        prompt = f"""You are an experienced veterinary doctor and canine behavior expert.
 
     User question:
     {query}
@@ -260,70 +476,44 @@ class DogHealthAnalyzer:
     - No bullet points
     """
 
-            response = self.llm_client.chat.completions.create(
-                model="deepseek/deepseek-v3.2",
-                messages=[
-                    {"role": "system", "content": "You are an experienced veterinary doctor."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.4
-            )
-
-            return response.choices[0].message.content.strip()
-
-        except Exception as e:
-            print(f"❌ Error in _common_question: {e}")
-            return "No results found due to error."
-
+        return [
+            {"role": "system", "content": "You are an experienced veterinary doctor."},
+            {"role": "user", "content": prompt}
+        ]
 
-    def _map_keypoints(self, data_keypts):
-        points = {
-            "TAIL_START": None, "TAIL_END": None,
-            "LEFT_EAR_BASE": None, "LEFT_EAR_TIP": None,
-            "RIGHT_EAR_BASE": None, "RIGHT_EAR_TIP": None,
-            "NOSE": None, "CHIN": None,
-            "LEFT_EYE": None, "RIGHT_EYE": None,
-            "THROAT": None, "WITHERS": None,
-            "REAR_KNEE": None
-        }
+    # history: code arrays per component, counted with bincount
+    def _build_behavior_profile(self, history):
+        return self._format_behavior_profile(
+            *[STATE_VOCABULARY[key].most_common(history[key]) for key in COMPONENTS]
+        )
 
-        for i, (x, y) in enumerate(data_keypts):
-            point = (int(x), int(y))
-            name = self.landmarks[i]
-
-            if name == "tail_start": points["TAIL_START"] = point
-            elif name == "tail_end": points["TAIL_END"] = point
-            elif name == "left_ear_base": points["LEFT_EAR_BASE"] = point
-            elif name == "left_ear_tip": points["LEFT_EAR_TIP"] = point
-            elif name == "right_ear_base": points["RIGHT_EAR_BASE"] = point
-            elif name == "right_ear_tip": points["RIGHT_EAR_TIP"] = point
-            elif name == "nose": points["NOSE"] = point
-            elif name == "chin": points["CHIN"] = point
-            elif name == "left_eye": points["LEFT_EYE"] = point
-            elif name == "right_eye": points["RIGHT_EYE"] = point
-            elif name == "throat": points["THROAT"] = point
-            elif name == "withers": points["WITHERS"] = point
-            elif name in ["rear_left_knee", "rear_right_knee"]:
-                points["REAR_KNEE"] = point
-
-        return points
-
-    def _most_common(self, lst):
-        return Counter(lst).most_common(1)[0][0] if lst else "unknown"
-
-    def _build_behavior_profile(self, tail, ears, head, posture):
+    def _format_behavior_profile(self, tail, ears, head, posture):
         return f"""
-Tail: {self._most_common(tail)}
-Ears: {self._most_common(ears)}
-Head: {self._most_common(head)}
-Posture: {self._most_common(posture)}
+Tail: {tail}
+Ears: {ears}
+Head: {head}
+Posture: {posture}
 """.strip()
 
     # =========================================================
     # LLM
     # =========================================================
     def _get_doctor_summary(self, profile_text):
+        # The profile comes from small fixed vocabularies, so most uploads
+        # hit an already generated summary
+        if self.summary_cache is not None:
+            cached = self.summary_cache.get(profile_text)
+            if cached is not None:
+                print("♻️ Doctor summary from cache")
+                return cached
+
+        summary = self._request_doctor_summary(profile_text)
+
+        if self.summary_cache is not None:
+            self.summary_cache.put(profile_text, summary)
+        return summary
+
+    def _request_doctor_summary(self, profile_text):
         prompt = f"""
 You are a professional veterinary AI doctor.
 
@@ -341,66 +531,41 @@ Rules:
 - Include health, activity, and recommendation
 """
 
-        response = self.llm_client.chat.completions.create(
-            model="deepseek/deepseek-v3.2",
+        summary = self.providers.run(self.providers.llm.chat(
+            model=LLM_MODEL,
             messages=[
                 {"role": "system", "content": "You are an experienced veterinary doctor."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=60,
             temperature=0.4
-        )
+        ), timeout=POST_PROCESS_TIMEOUTS["doctor_summary"])
 
-        return response.choices[0].message.content.strip()
+        return summary.strip()
 
     # =========================================================
     # TTS
     # =========================================================
     def _generate_doctor_voice(self, text, output_path):
-        audio = self.tts_client.text_to_speech.convert(
+        if self.audio_cache is not None:
+            key = audio_key(text, self.voice_id, TTS_MODEL_ID, TTS_OUTPUT_FORMAT, TTS_VOICE_SETTINGS)
+            if self.audio_cache.export(key, output_path) is not None:
+                print("♻️ Doctor voice from cache")
+                return output_path
+
+        audio = self.providers.run(self.providers.tts.speak(
             text=text,
             voice_id=self.voice_id,
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
-            voice_settings={
-                "stability": 0.4,
-                "similarity_boost": 0.6,
-                "style": 0.6,
-                "use_speaker_boost": True
-            }
-        )
+            model_id=TTS_MODEL_ID,
+            output_format=TTS_OUTPUT_FORMAT,
+            voice_settings=TTS_VOICE_SETTINGS
+        ), timeout=POST_PROCESS_TIMEOUTS["doctor_voice"])
 
-        with open(output_path, "wb") as f:
-            for chunk in audio:
-                f.write(chunk)
+        if self.audio_cache is not None:
+            self.audio_cache.put(key, [audio])
+            self.audio_cache.export(key, output_path)
+            return output_path
 
-    # =========================================================
-    # GRAPHS
-    # =========================================================
-    def _generate_graphs(self, state_history, output_dir):
-        graphs = {}
-        for key in ["tail", "ears", "head", "posture"]:
-            path = self._plot_state_timeline(state_history[key], key, output_dir)
-            graphs[key] = path
-        return graphs
-
-    def _plot_state_timeline(self, states, title, output_dir):
-        encoded = self._encode_states(states)
-
-        plt.figure()
-        plt.plot(encoded)
-        plt.title(f"{title.capitalize()} State Over Time")
-        plt.xlabel("Frame")
-        plt.ylabel("State Index")
-
-        path = os.path.join(output_dir, f"{title}_timeline.png")
-        plt.savefig(path)
-        plt.close()
-
-        print(f"📈 {title.capitalize()} graph saved at: {path}")
-        return path
-
-    def _encode_states(self, states):
-        unique = list(set(states))
-        mapping = {state: i for i, state in enumerate(unique)}
-        return [mapping[s] for s in states]
+        with open(output_path, "wb") as f:
+            f.write(audio)
+        return output_path
@@ -1,4 +1,16 @@
 import math
+import numpy as np
+
+EAR_LABELS = np.array([
+    "Unknown",
+    "Ears Forward (Alert/Curious)",
+    "Ears Back (Fear/Submissive)",
+    "Neutral Ears",
+    "Unknown",
+    "Ears Forward (Alert/Curious) + Asymmetric (Confused)",
+    "Ears Back (Fear/Submissive) + Asymmetric (Confused)",
+    "Neutral Ears + Asymmetric (Confused)",
+], dtype=object)
 
 def compute_angle(p1, p2):
     dx = p2[0] - p1[0]
@@ -38,3 +50,27 @@ class EarAnalysis:
             result["state"] = state
 
         return result
+
+    # ================= BATCH =================
+    # All points are (T, 2) arrays; NaN rows mark frames without a dog.
+    # "code" indexes EAR_LABELS.
+    @staticmethod
+    def analyze_batch(left_base, left_tip, right_base, right_tip):
+        ld = left_tip - left_base
+        rd = right_tip - right_base
+        la = np.degrees(np.arctan2(ld[:, 1], ld[:, 0]))
+        ra = np.degrees(np.arctan2(rd[:, 1], rd[:, 0]))
+
+        valid = ~np.isnan(la) & ~np.isnan(ra)
+        diff = np.abs(la - ra)
+        avg = (la + ra) / 2
+
+        codes = np.where(avg < -20, 1, np.where(avg > 40, 2, 3)).astype(np.uint8)
+        codes[diff > 25] += 4
+        codes[~valid] = 0
+
+        return {
+            "left_angle": la,
+            "right_angle": ra,
+            "code": codes
+        }
@@ -0,0 +1,120 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from services.EmotionRules import EmotionRules, emotional_report
+
+
+class EmotionAccumulator:
+    # Online version of the emotional report. Each frame costs O(1): its
+    # emotions are packed into a bitmask, added to the cumulative counters
+    # and to a sliding window that drops frames older than window_seconds.
+    # Accumulators built over separate chunks of a video can be merged.
+    def __init__(self, rules=None, window_seconds=10.0, weights=None, worry_thresholds=None):
+        self.rules = rules or EmotionRules()
+        self.emotions = self.rules.emotions
+        self.window_seconds = window_seconds
+        self.weights = weights
+        self.worry_thresholds = worry_thresholds
+
+        self.total = 0
+        self.counts = [0] * len(self.emotions)
+        self.window_frames = deque()   # (timestamp, bits) of counted frames in the window
+        self.window_counts = [0] * len(self.emotions)
+        self.last_timestamp = None
+
+    # =========================================================
+    # UPDATE
+    # =========================================================
+    # codes: component -> state code for one frame
+    def update(self, timestamp, codes, detected=True):
+        bits = 0
+        if detected:
+            for i, emotion in enumerate(self.emotions):
+                for clauses in self.rules.compiled[emotion]:
+                    if all(table[codes[component]] for component, table in clauses):
+                        bits |= 1 << i
+                        break
+        self._add(timestamp, bits, detected)
+
+    # Same as calling update() per frame, with the rule evaluation vectorized
+    def update_batch(self, timestamps, codes, detected=None):
+        masks = self.rules.masks(codes)
+        bits = np.zeros(len(timestamps), dtype=np.int64)
+        for i, emotion in enumerate(self.emotions):
+            bits |= masks[emotion].astype(np.int64) << i
+
+        if detected is None:
+            detected = np.ones(len(timestamps), dtype=bool)
+
+        for timestamp, frame_bits, found in zip(np.asarray(timestamps).tolist(), bits.tolist(), np.asarray(detected).tolist()):
+            self._add(timestamp, frame_bits, found)
+
+    def _add(self, timestamp, bits, counted):
+        self.last_timestamp = timestamp if self.last_timestamp is None else max(self.last_timestamp, timestamp)
+
+        if counted:
+            self.total += 1
+            self.window_frames.append((timestamp, bits))
+            for i in range(len(self.emotions)):
+                if bits >> i & 1:
+                    self.counts[i] += 1
+                    self.window_counts[i] += 1
+
+        self._evict()
+
+    def _evict(self):
+        cutoff = self.last_timestamp - self.window_seconds
+        while self.window_frames and self.window_frames[0][0] <= cutoff:
+            _, bits = self.window_frames.popleft()
+            for i in range(len(self.emotions)):
+                if bits >> i & 1:
+                    self.window_counts[i] -= 1
+
+    # =========================================================
+    # MERGE
+    # =========================================================
+    # Cumulative counters add up exactly; the window is rebuilt from both
+    # windows' frames, relative to the later of the two end times.
+    def merge(self, other):
+        if other.emotions != self.emotions or other.window_seconds != self.window_seconds:
+            raise ValueError("Can only merge accumulators with the same rules and window")
+
+        merged = EmotionAccumulator(self.rules, self.window_seconds, self.weights, self.worry_thresholds)
+        merged.total = self.total + other.total
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+        stamps = [t for t in (self.last_timestamp, other.last_timestamp) if t is not None]
+        merged.last_timestamp = max(stamps) if stamps else None
+
+        for timestamp, bits in heapq.merge(self.window_frames, other.window_frames, key=lambda item: item[0]):
+            merged.window_frames.append((timestamp, bits))
+            for i in range(len(self.emotions)):
+                if bits >> i & 1:
+                    merged.window_counts[i] += 1
+        if merged.last_timestamp is not None:
+            merged._evict()
+        return merged
+
+    # =========================================================
+    # REPORT
+    # =========================================================
+    def cumulative(self):
+        return self._report(self.counts, self.total)
+
+    def window(self):
+        return self._report(self.window_counts, len(self.window_frames))
+
+    def snapshot(self):
+        return {
+            "timestamp": self.last_timestamp,
+            "frames": self.total,
+            "window_seconds": self.window_seconds,
+            "window_frames": len(self.window_frames),
+            "cumulative": self.cumulative(),
+            "window": self.window()
+        }
+
+    def _report(self, counts, total):
+        return emotional_report(dict(zip(self.emotions, counts)), total, self.weights, self.worry_thresholds)
@@ -0,0 +1,127 @@
+import numpy as np
+
+from services.StateVocabulary import STATE_VOCABULARY
+
+# =========================================================
+# RULES
+# =========================================================
+# Each emotion is a list of alternatives (OR); each alternative maps
+# components to the label parts it accepts (AND across components). Parts
+# are the analyzers' own wording, matched against every " + " piece of a
+# label, so "Ears Forward (Alert/Curious)" also covers
+# "Ears Forward (Alert/Curious) + Asymmetric (Confused)".
+EMOTION_RULES = {
+    "happy": [
+        {"tail": ["Wagging"], "ears": ["Ears Forward (Alert/Curious)"], "head": ["Head Up (Confident/Alert)"]}
+    ],
+    "sad": [
+        {"tail": ["Still"], "ears": ["Ears Back (Fear/Submissive)"]},
+        {"tail": ["Still"], "head": ["Head Down (Submissive/Sad)"]}
+    ],
+    "neutral": [
+        {"tail": ["Still"], "ears": ["Neutral Ears"], "head": ["Head Neutral"]}
+    ],
+    # The posture analyzer has no gait labels; standing tall comes from the
+    # withers rising between frames. Crouching is left out: it is a fear
+    # signal (environment_stress), not activity.
+    "active": [
+        {"tail": ["Wagging"]},
+        {"posture": ["Standing Tall (Confident)"]}
+    ],
+    "environment_stress": [
+        {"ears": ["Ears Back (Fear/Submissive)"]},
+        {"head": ["Head Down (Submissive/Sad)"]},
+        {"posture": ["Crouching (Fear/Submissive)"]}
+    ]
+}
+
+# Percent of frames -> mental_health_percent contribution
+DEFAULT_EMOTION_WEIGHTS = {
+    "happy": 1.0,
+    "neutral": 0.6,
+    "sad": -0.8,
+    "environment_stress": -0.7
+}
+
+# Worry when any of these percentages is exceeded
+DEFAULT_WORRY_THRESHOLDS = {
+    "sad": 40,
+    "environment_stress": 35
+}
+
+
+class EmotionRules:
+    def __init__(self, rules=None, vocabulary=None):
+        self.rules = rules or EMOTION_RULES
+        self.vocabulary = vocabulary or STATE_VOCABULARY
+        self.emotions = list(self.rules)
+        self.compiled = self._compile()
+
+    # Every clause becomes a boolean lookup table over its component's
+    # vocabulary, so evaluating it on a timeline is one fancy-index.
+    def _compile(self):
+        compiled = {}
+        for emotion, alternatives in self.rules.items():
+            compiled[emotion] = []
+            for alternative in alternatives:
+                clauses = []
+                for component, parts in alternative.items():
+                    vocab = self.vocabulary[component]
+                    unknown = set(parts) - {p for label in vocab.labels for p in label.split(" + ")}
+                    if unknown:
+                        raise ValueError(f"Rule '{emotion}' uses unknown {component} states: {sorted(unknown)}")
+
+                    table = np.array([bool(set(label.split(" + ")) & set(parts)) for label in vocab.labels])
+                    clauses.append((component, table))
+                compiled[emotion].append(clauses)
+        return compiled
+
+    # =========================================================
+    # EVALUATE
+    # =========================================================
+    # codes: component -> code array (same length). Returns emotion -> bool mask.
+    def masks(self, codes):
+        length = len(next(iter(codes.values()))) if codes else 0
+        result = {}
+        for emotion, alternatives in self.compiled.items():
+            mask = np.zeros(length, dtype=bool)
+            for clauses in alternatives:
+                match = np.ones(length, dtype=bool)
+                for component, table in clauses:
+                    match &= table[codes[component]]
+                mask |= match
+            result[emotion] = mask
+        return result
+
+    def counts(self, codes):
+        return {emotion: int(mask.sum()) for emotion, mask in self.masks(codes).items()}
+
+
+# =========================================================
+# REPORT
+# =========================================================
+def emotional_report(counts, total, weights=None, worry_thresholds=None):
+    if total == 0:
+        return {}
+
+    weights = DEFAULT_EMOTION_WEIGHTS if weights is None else weights
+    worry_thresholds = DEFAULT_WORRY_THRESHOLDS if worry_thresholds is None else worry_thresholds
+
+    percent = {emotion: round(count / total * 100, 2) for emotion, count in counts.items()}
+
+    mental_health = sum(percent.get(emotion, 0) * weight for emotion, weight in weights.items())
+    mental_health = max(0, min(100, round(mental_health, 2)))
+
+    worry = "No immediate concern"
+    if any(percent.get(emotion, 0) > limit for emotion, limit in worry_thresholds.items()):
+        worry = "Yes, your dog may be stressed or uncomfortable"
+
+    return {
+        "happy_percent": percent["happy"],
+        "sad_percent": percent["sad"],
+        "neutral_percent": percent["neutral"],
+        "activity_percent": percent["active"],
+        "environment_impact_percent": percent["environment_stress"],
+        "mental_health_percent": mental_health,
+        "should_worry": worry
+    }
@@ -0,0 +1,117 @@
+import math
+from bisect import bisect_right
+from datetime import datetime
+
+# Series column -> emotional_report key
+TREND_METRICS = {
+    "mental_health": "mental_health_percent",
+    "happy": "happy_percent",
+    "sad": "sad_percent",
+    "neutral": "neutral_percent",
+    "activity": "activity_percent",
+    "environment_stress": "environment_impact_percent"
+}
+
+SECONDS_PER_DAY = 86400.0
+
+
+def to_day(timestamp):
+    # ISO date / datetime -> fractional days since the epoch, None if unparsable
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp() / SECONDS_PER_DAY
+    except ValueError:
+        return None
+
+
+class EmotionTrends:
+    # Per-session rolling aggregates of a dog's emotional metrics. Each
+    # session gets, per metric, the mean over every window (ending at that
+    # session), the least-squares slope over the longest window (per day),
+    # and a change-point flag from a two-sided CUSUM against the dog's own
+    # baseline. The detector state is carried from session to session, so
+    # adding a session never needs the dog's whole history.
+    def __init__(self, windows_days=(7, 30), change_threshold=6.0, change_drift=0.5, min_sessions=10):
+        # The baseline needs a standard deviation, i.e. at least two sessions
+        if min_sessions < 2:
+            raise ValueError(f"min_sessions must be at least 2, got {min_sessions}")
+
+        self.windows_days = tuple(sorted(windows_days))
+        self.longest = self.windows_days[-1]
+        self.change_threshold = change_threshold
+        self.change_drift = change_drift
+        self.min_sessions = min_sessions
+
+    # rows: [(day, {metric: value})] sorted by time. rows[:first] are only
+    # window context; returns (trend, state) for each of rows[first:],
+    # starting from the detector state of the session before rows[first].
+    def replay(self, rows, first, state=None):
+        days = [day for day, _ in rows]
+        state = state or {}
+        out = []
+
+        for i in range(first, len(rows)):
+            day, values = rows[i]
+            trend = {}
+            next_state = dict(state)
+
+            for metric in TREND_METRICS:
+                value = values.get(metric)
+                if value is None:
+                    continue
+
+                trend[metric] = {}
+                for window in self.windows_days:
+                    points = self._window(rows, days, i, window, metric)
+                    trend[metric][f"mean_{window}d"] = round(sum(v for _, v in points) / len(points), 2)
+                trend[metric][f"slope_{self.longest}d"] = self._slope(self._window(rows, days, i, self.longest, metric))
+
+                change, next_state[metric] = self._detect(state.get(metric), value)
+                trend[metric]["change"] = change
+
+            out.append((trend, next_state))
+            state = next_state
+        return out
+
+    # Sessions in (day - window, day] up to and including session i
+    def _window(self, rows, days, i, window, metric):
+        lo = bisect_right(days, days[i] - window, 0, i + 1)
+        return [(d, v[metric]) for d, v in rows[lo:i + 1] if v.get(metric) is not None]
+
+    def _slope(self, points):
+        if len(points) < 2:
+            return None
+        n = len(points)
+        mean_x = sum(d for d, _ in points) / n
+        mean_y = sum(v for _, v in points) / n
+        sxx = sum((d - mean_x) ** 2 for d, _ in points)
+        if sxx == 0:
+            return None
+        sxy = sum((d - mean_x) * (v - mean_y) for d, v in points)
+        return round(sxy / sxx, 4)
+
+    # Baseline mean / variance (Welford) plus the CUSUM sums, in baseline
+    # standard deviations. After a change the baseline starts over from the
+    # new level.
+    def _detect(self, state, value):
+        state = dict(state) if state else {"n": 0, "mean": 0.0, "m2": 0.0, "pos": 0.0, "neg": 0.0}
+        change = None
+
+        if state["n"] >= self.min_sessions:
+            std = math.sqrt(state["m2"] / (state["n"] - 1))
+            if std > 0:
+                z = (value - state["mean"]) / std
+                state["pos"] = max(0.0, state["pos"] + z - self.change_drift)
+                state["neg"] = max(0.0, state["neg"] - z - self.change_drift)
+                if state["pos"] > self.change_threshold:
+                    change = "up"
+                elif state["neg"] > self.change_threshold:
+                    change = "down"
+
+        if change is not None:
+            state = {"n": 0, "mean": 0.0, "m2": 0.0, "pos": 0.0, "neg": 0.0}
+
+        state["n"] += 1
+        delta = value - state["mean"]
+        state["mean"] += delta / state["n"]
+        state["m2"] += delta * (value - state["mean"])
+        return change, state
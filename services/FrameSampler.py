@@ -0,0 +1,146 @@
+import cv2
+
+SAMPLING_MODES = ("fps", "stride", "count", "first")
+
+
+class FrameSampler:
+    def __init__(self, mode="fps", target_fps=2.0, stride=15, count=300, max_frames=None, seek_threshold=30):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+
+        self.mode = mode
+        self.target_fps = target_fps
+        self.stride = max(1, int(stride))
+        self.count = max(1, int(count))
+        self.max_frames = max_frames
+        # Gaps larger than this are crossed with a container seek instead of
+        # grabbing (demuxing) every frame in between.
+        self.seek_threshold = seek_threshold
+
+    def config(self):
+        return {
+            "mode": self.mode,
+            "target_fps": self.target_fps,
+            "stride": self.stride,
+            "count": self.count,
+            "max_frames": self.max_frames
+        }
+
+    # =========================================================
+    # PLAN
+    # =========================================================
+    def plan(self, total_frames, native_fps):
+        if total_frames <= 0:
+            return []
+
+        if self.mode == "first":
+            indices = range(total_frames)
+        elif self.mode == "stride":
+            indices = range(0, total_frames, self.stride)
+        elif self.mode == "count":
+            if self.count >= total_frames:
+                indices = range(total_frames)
+            else:
+                step = (total_frames - 1) / max(1, self.count - 1)
+                indices = sorted({round(i * step) for i in range(self.count)})
+        else:
+            step = max(1.0, native_fps / self.target_fps) if native_fps > 0 else 1.0
+            indices = sorted({int(round(i * step)) for i in range(int(total_frames / step) + 1)})
+            indices = [i for i in indices if i < total_frames]
+
+        indices = list(indices)
+        if self.max_frames is not None:
+            indices = indices[:self.max_frames]
+        return indices
+
+    # On-the-fly version of plan() for clips whose frame count is missing
+    # (streamed or variable-frame-rate webm / mkv): decides per decoded
+    # frame, from its index and timestamp
+    def keep(self, idx, timestamp, kept):
+        if self.mode == "stride":
+            return idx % self.stride == 0
+        if self.mode == "fps":
+            return timestamp >= kept / self.target_fps
+        return True
+
+    # =========================================================
+    # DECODE
+    # =========================================================
+    def frames(self, video_path):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+
+        decoded = 0
+        try:
+            native_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+            if total_frames <= 0 and self.mode == "count":
+                # Spreading N frames needs the length; count it with a grab pass
+                total_frames = self._count_frames(cap)
+                cap.release()
+                cap = cv2.VideoCapture(video_path)
+
+            if total_frames > 0:
+                indices = self.plan(total_frames, native_fps)
+                print(f"🎞️ Sampling {len(indices)} of {total_frames} frames ({self.mode} mode)")
+                frames = self._planned(cap, indices, native_fps)
+            else:
+                print(f"🎞️ Frame count unknown, sampling while decoding ({self.mode} mode)")
+                frames = self._sequential(cap, native_fps)
+
+            for item in frames:
+                decoded += 1
+                yield item
+        finally:
+            cap.release()
+
+        if decoded == 0:
+            raise IOError(f"No frames could be decoded from video: {video_path}")
+
+    def _planned(self, cap, indices, native_fps):
+        position = 0
+        for idx in indices:
+            gap = idx - position
+            if gap > self.seek_threshold:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            else:
+                for _ in range(gap):
+                    cap.grab()
+
+            ok, frame = cap.read()
+            if not ok:
+                break
+            position = idx + 1
+
+            yield idx, self._timestamp(cap, idx, native_fps), frame
+
+    def _sequential(self, cap, native_fps):
+        idx = 0
+        kept = 0
+        while True:
+            if self.max_frames is not None and kept >= self.max_frames:
+                return
+            ok, frame = cap.read()
+            if not ok:
+                return
+
+            timestamp = self._timestamp(cap, idx, native_fps)
+            if self.keep(idx, timestamp, kept):
+                kept += 1
+                yield idx, timestamp, frame
+            idx += 1
+
+    def _count_frames(self, cap):
+        total = 0
+        while cap.grab():
+            total += 1
+        return total
+
+    def _timestamp(self, cap, idx, native_fps):
+        # Read after cap.read(): POS_MSEC is then the frame just decoded
+        msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if msec and msec > 0:
+            return msec / 1000.0
+        return idx / native_fps if native_fps > 0 else 0.0
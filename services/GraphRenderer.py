@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from services.BehaviorSegments import STATE, START_TS, END_TS
+
+COMPONENT_TITLES = {
+    "tail": "Tail Movement",
+    "ears": "Ear Posture",
+    "head": "Head Orientation",
+    "posture": "Body Posture"
+}
+
+
+def short_label(label):
+    # "Head Down (Submissive/Sad) + Looking Left" -> "Head Down + Looking Left"
+    return re.sub(r" \([^)]*\)", "", label)
+
+
+# =========================================================
+# RENDER (runs in the worker process)
+# =========================================================
+# Object-oriented Agg API only: no pyplot state machine, so nothing is
+# shared between figures. One multi-panel figure per analysis; the y axes
+# list the full fixed vocabulary, so every export has the same layout.
+def render_timeline(timeline_path, output_path):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    with open(timeline_path) as f:
+        timeline = json.load(f)
+
+    segments = timeline["segments"]
+    vocabulary = timeline["vocabulary"]
+    heights = [max(2, len(vocabulary[key])) for key in segments]
+
+    fig = Figure(figsize=(12, 0.22 * sum(heights) + 1.5 * len(heights)), dpi=100)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(len(segments), 1, sharex=True, squeeze=False,
+                        gridspec_kw={"height_ratios": heights})[:, 0]
+
+    for ax, (key, runs) in zip(axes, segments.items()):
+        vocab = vocabulary[key]
+        if runs:
+            # Each state holds from its segment's start to the next one
+            x = [seg[START_TS] for seg in runs] + [runs[-1][END_TS]]
+            y = [seg[STATE] for seg in runs] + [runs[-1][STATE]]
+            ax.step(x, y, where="post", color="#4f46e5")
+        ax.set_yticks(range(len(vocab)))
+        ax.set_yticklabels([short_label(label) for label in vocab], fontsize=7)
+        ax.set_ylim(-0.5, len(vocab) - 0.5)
+        ax.set_title(COMPONENT_TITLES.get(key, key.capitalize()), fontsize=10, loc="left")
+        ax.grid(axis="y", alpha=0.2)
+
+    axes[-1].set_xlabel("Time (s)")
+    fig.tight_layout()
+
+    tmp_path = output_path + ".tmp.png"
+    fig.savefig(tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+# =========================================================
+# WORKER
+# =========================================================
+class GraphRenderer:
+    # A dedicated spawned process renders PNG exports, so matplotlib never
+    # runs on Flask or analysis threads and a slow render blocks nobody.
+    def __init__(self, workers=1):
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.renders = {}
+        self.lock = threading.Lock()
+
+    def submit(self, timeline_path, output_path):
+        with self.lock:
+            future = self.renders.get(output_path)
+            if future is not None and not future.done():
+                # Already rendering this export
+                return future
+
+            if os.path.exists(output_path):
+                future = Future()
+                future.set_result(output_path)
+                return future
+
+            future = self.executor.submit(render_timeline, timeline_path, output_path)
+            self.renders[output_path] = future
+
+        future.add_done_callback(lambda f: self._finished(output_path, f))
+        return future
+
+    def status(self, output_path):
+        with self.lock:
+            future = self.renders.get(output_path)
+
+        if future is None:
+            return "done" if os.path.exists(output_path) else "missing"
+        if not future.done():
+            return "rendering"
+        return "failed" if future.exception() is not None else "done"
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def _finished(self, output_path, future):
+        error = future.exception()
+        if error is not None:
+            # Kept so status() reports the failure until the next submit
+            print(f"❌ Graph export failed for {output_path}: {error}")
+            return
+
+        with self.lock:
+            self.renders.pop(output_path, None)
+        print(f"📈 Graph exported at: {output_path}")
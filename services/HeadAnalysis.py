@@ -1,4 +1,20 @@
 import math
+import numpy as np
+
+UP_DOWN_PARTS = [None, "Head Down (Submissive/Sad)", "Head Up (Confident/Alert)", "Head Neutral"]
+LEFT_RIGHT_PARTS = [None, "Looking Right", "Looking Left"]
+TILT_PARTS = [None, "Head Tilted (Curious)"]
+
+
+def _head_label(up_down, left_right, tilt):
+    parts = [p for p in (UP_DOWN_PARTS[up_down], LEFT_RIGHT_PARTS[left_right], TILT_PARTS[tilt]) if p]
+    return " + ".join(parts) if parts else "Unknown"
+
+
+# Every combination of the three parts, indexed by up_down * 6 + left_right * 2 + tilt
+HEAD_LABELS = np.array([
+    _head_label(u, l, t) for u in range(4) for l in range(3) for t in range(2)
+], dtype=object)
 
 def compute_vector(p1, p2):
     return (p2[0] - p1[0], p2[1] - p1[1])
@@ -51,3 +67,31 @@ class HeadAnalysis:
             result["state"] = " + ".join(parts)
 
         return result
+
+    # ================= BATCH =================
+    # All points are (T, 2) arrays; NaN rows mark frames without a dog.
+    # "code" indexes HEAD_LABELS.
+    @staticmethod
+    def analyze_batch(nose, chin, left_eye, right_eye, throat, withers):
+        ud = nose - chin
+        lr = nose - throat
+        tl = right_eye - left_eye
+
+        # 0 - dy (not -dy) keeps +0.0, matching math.atan2 on the int points
+        up_down = np.degrees(np.arctan2(ud[:, 0], 0 - ud[:, 1]))
+        left_right = np.degrees(np.arctan2(lr[:, 1], lr[:, 0]))
+        tilt = np.degrees(np.arctan2(tl[:, 1], tl[:, 0]))
+
+        up_down_code = np.where(up_down < -15, 1, np.where(up_down > 15, 2, 3))
+        up_down_code[np.isnan(up_down)] = 0
+        left_right_code = np.where(left_right > 20, 1, np.where(left_right < -20, 2, 0))
+        tilt_code = (np.abs(tilt) > 15).astype(int)
+
+        codes = (up_down_code * 6 + left_right_code * 2 + tilt_code).astype(np.uint8)
+
+        return {
+            "head_up_down_angle": up_down,
+            "head_left_right_angle": left_right,
+            "head_tilt": tilt,
+            "code": codes
+        }
@@ -0,0 +1,217 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+from services.AnalysisWorker import build_default_analyzer, init_worker, run_analysis
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, analyzer_factory=build_default_analyzer, workers=2, mode="thread",
+                 max_pending=32, keep_finished_seconds=3600, result_cache=None, on_finished=None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown worker mode: {mode}")
+
+        self.mode = mode
+        self.max_pending = max_pending
+        self.keep_finished_seconds = keep_finished_seconds
+        self.result_cache = result_cache
+        # Called as on_finished(job_id, result) after each successful analysis
+        self.on_finished = on_finished
+
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(analyzer_factory,)
+            )
+        else:
+            # Spawned, not forked: a fork would copy the web process's
+            # threads (provider event loop, DB writer) without running them.
+            # Workers run services.AnalysisWorker; the launching script is
+            # re-imported too, so app.py keeps its setup in create_app().
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(analyzer_factory,)
+            )
+
+        # on_finished runs here, off the request thread (cache hits) and the
+        # process pool's result thread, in finishing order
+        self.hooks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-hooks")
+
+        self.jobs = {}
+        self.lock = threading.RLock()
+
+    # =========================================================
+    # SUBMIT
+    # =========================================================
+    def submit(self, video_path, output_dir, meta=None, video_hash=None):
+        with self.lock:
+            self._prune()
+            job_id = uuid.uuid4().hex
+
+            # The same video already queued or running (double submit,
+            # client retry): share its analysis instead of running another
+            running = self._find_running(video_hash)
+            if running is not None:
+                future = running["future"]
+                self._add(job_id, video_path, None, meta, future, video_hash, live=running["live"])
+            else:
+                # Jobs sharing one analysis count once
+                pending = len({job["future"] for job in self.jobs.values() if not job["future"].done()})
+                if pending >= self.max_pending:
+                    raise JobQueueFull(f"{pending} analysis jobs already pending")
+
+                job_dir = os.path.join(output_dir, job_id)
+                os.makedirs(job_dir, exist_ok=True)
+
+                # Live scores need shared memory with the worker, so thread mode only
+                on_progress = None
+                if self.mode == "thread":
+                    on_progress = lambda snapshot, job_id=job_id: self._set_live(job_id, snapshot)
+
+                future = self.executor.submit(run_analysis, video_path, job_dir, video_hash, self.result_cache, on_progress)
+                self._add(job_id, video_path, job_dir, meta, future, video_hash)
+        self._watch(job_id, future)
+
+        if running is not None:
+            print(f"📥 Job {job_id} joins running analysis {running['id']} for {video_path}")
+        else:
+            print(f"📥 Queued analysis job {job_id} for {video_path}")
+        return job_id
+
+    # Registers an already available result (e.g. a result cache hit) as a
+    # finished job, so clients use the same /jobs/<id> flow.
+    def add_completed(self, video_path, result, meta=None):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        future.set_result(result)
+
+        with self.lock:
+            self._prune()
+            job_id = uuid.uuid4().hex
+            self._add(job_id, video_path, None, meta, future)
+        # The future is already done: marked finished right here, on_finished
+        # is queued on the hook thread
+        self._watch(job_id, future)
+        return job_id
+
+    # =========================================================
+    # STATUS
+    # =========================================================
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        future = job["future"]
+        status = {
+            "id": job_id,
+            "status": self._status(future),
+            "created": job["created"],
+            "finished": job["finished"],
+            "meta": job["meta"],
+            "live": job["live"],
+            "result": None,
+            "error": None
+        }
+
+        if future.done() and not future.cancelled():
+            error = future.exception()
+            if error is not None:
+                status["error"] = str(error)
+            else:
+                status["result"] = future.result()
+
+        return status
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        self.hooks.shutdown(wait=wait)
+
+    # =========================================================
+    # HELPERS
+    # =========================================================
+    def _status(self, future):
+        if future.cancelled():
+            return "cancelled"
+        if future.done():
+            return "failed" if future.exception() is not None else "done"
+        if future.running():
+            return "running"
+        return "queued"
+
+    def _add(self, job_id, video_path, job_dir, meta, future, video_hash=None, live=None):
+        self.jobs[job_id] = {
+            "id": job_id,
+            "video_path": video_path,
+            "video_hash": video_hash,
+            "output_dir": job_dir,
+            "meta": meta or {},
+            "created": time.time(),
+            "finished": None,
+            "live": live,
+            "future": future
+        }
+
+    def _find_running(self, video_hash):
+        if not video_hash:
+            return None
+        for job in self.jobs.values():
+            if job["video_hash"] == video_hash and job["output_dir"] is not None and not job["future"].done():
+                return job
+        return None
+
+    # Outside self.lock: a done future runs the callback (which queues on_finished)
+    # immediately, which must not block every other job lookup
+    def _watch(self, job_id, future):
+        future.add_done_callback(lambda f, job_id=job_id: self._mark_finished(job_id))
+
+    def _set_live(self, job_id, snapshot):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            # Also every job that joined this analysis
+            for other in self.jobs.values():
+                if other["future"] is job["future"]:
+                    other["live"] = snapshot
+
+    def _mark_finished(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job["finished"] = time.time()
+
+        error = job["future"].exception() if job and not job["future"].cancelled() else None
+        if error is not None:
+            print(f"❌ Analysis job {job_id} failed: {error}")
+            return
+
+        print(f"✅ Analysis job {job_id} finished")
+        if self.on_finished is not None and job and not job["future"].cancelled():
+            self.hooks.submit(self._run_hook, job_id, job["future"].result())
+
+    def _run_hook(self, job_id, result):
+        try:
+            self.on_finished(job_id, result)
+        except Exception as e:
+            print(f"⚠️ on_finished hook failed for job {job_id}: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished"] is not None and job["finished"] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
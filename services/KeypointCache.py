@@ -0,0 +1,84 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from services.PoseLayout import PoseBuffer
+
+# Part of every cache file name; bump when the stored precision, layout or
+# frame timestamps change, so older entries are re-inferred instead of replayed
+CACHE_FORMAT = 3
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def config_hash(config):
+    text = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class KeypointCache:
+    def __init__(self, cache_dir="keypoint_cache"):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # =========================================================
+    # KEYS
+    # =========================================================
+    def path_for(self, video_hash, weights_hash, inference_config):
+        name = f"{video_hash[:32]}_{weights_hash[:16]}_{config_hash(inference_config)[:8]}_v{CACHE_FORMAT}.npz"
+        return os.path.join(self.cache_dir, name)
+
+    # =========================================================
+    # LOAD / SAVE
+    # =========================================================
+    def load(self, path):
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            xy = data["xy"].astype(np.float32)
+            conf = data["conf"].astype(np.float32)
+            frames = data["frames"]
+            times = data["times"].astype(np.float64)
+
+        poses = PoseBuffer(xy.shape[1], capacity=max(1, len(frames)))
+        poses.frame_ids[:len(frames)] = frames
+        poses.timestamps[:len(frames)] = times
+        poses.pose[:len(frames), :, :2] = xy
+        poses.pose[:len(frames), :, 2] = conf
+        poses.size = len(frames)
+        return poses
+
+    def save(self, path, poses, meta):
+        # Stored at the live run's precision so replayed labels match it
+        # exactly: the analyzers compare confidences (e.g. which rear knee to
+        # use), so even those can't be rounded down.
+        data = poses.data
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            xy=data[:, :, :2].astype(np.float32),
+            conf=data[:, :, 2].astype(np.float32),
+            frames=poses.frames.astype(np.int32),
+            times=poses.times.astype(np.float64),
+            meta=np.array(json.dumps(meta))
+        )
+        os.replace(tmp_path, path)
+        print(f"💾 Keypoints cached at: {path}")
+        return path
+
+    def meta(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            return json.loads(str(data["meta"]))
+
+    def entries(self):
+        for name in sorted(os.listdir(self.cache_dir)):
+            if name.endswith(f"_v{CACHE_FORMAT}.npz") and not name.endswith(".tmp.npz"):
+                yield os.path.join(self.cache_dir, name)
@@ -0,0 +1,75 @@
+import time
+import numpy as np
+
+
+class PoseInference:
+    def __init__(self, model, device, batch_size=8, imgsz=640):
+        self.model = model
+        self.device = device
+        self.batch_size = max(1, int(batch_size))
+        self.imgsz = imgsz
+
+        self.frames_processed = 0
+        self.inference_seconds = 0.0
+
+    # =========================================================
+    # MAIN ENTRY
+    # =========================================================
+    # frames: (frame_index, timestamp, image) -> yields (frame_index, timestamp, keypoints)
+    # in frame order; keypoints is a (K, 3) x/y/confidence array, or None when
+    # no dog was detected.
+    def run(self, frames):
+        self.frames_processed = 0
+        self.inference_seconds = 0.0
+
+        batch = []
+        for item in frames:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield from self._run_batch(batch)
+                batch = []
+
+        if batch:
+            yield from self._run_batch(batch)
+
+        print(f"⚡ Pose inference: {self.frames_processed} frames at {self.fps:.1f} frames/sec "
+              f"(batch={self.batch_size}, imgsz={self.imgsz})")
+
+    @property
+    def fps(self):
+        if self.inference_seconds == 0:
+            return 0.0
+        return self.frames_processed / self.inference_seconds
+
+    # =========================================================
+    # HELPERS
+    # =========================================================
+    def _run_batch(self, batch):
+        images = [image for _, _, image in batch]
+
+        start = time.perf_counter()
+        results = self.model.predict(
+            source=images, device=self.device, imgsz=self.imgsz,
+            batch=len(images), save=False, show=False, verbose=False
+        )
+        keypoints = [self._extract(data) for data in results]
+        self.inference_seconds += time.perf_counter() - start
+        self.frames_processed += len(batch)
+
+        # Drop the decoded images and Results tensors before the next batch
+        del images, results
+        for (idx, timestamp, _), data_keypts in zip(batch, keypoints):
+            yield idx, timestamp, data_keypts
+        batch.clear()
+
+    # (K, 3) array of x, y, confidence for the first detected dog
+    def _extract(self, data):
+        if data.keypoints is None or len(data.keypoints.xy) == 0:
+            return None
+
+        xy = data.keypoints.xy[0].cpu().numpy()
+        keypts = np.full((xy.shape[0], 3), np.nan, dtype=np.float32)
+        keypts[:, :2] = xy
+        if data.keypoints.conf is not None:
+            keypts[:, 2] = data.keypoints.conf[0].cpu().numpy()
+        return keypts
@@ -0,0 +1,76 @@
+import numpy as np
+
+# Landmarks the analyzers read; each becomes an index attribute on PoseLayout
+REQUIRED_LANDMARKS = (
+    "tail_start", "tail_end",
+    "left_ear_base", "left_ear_tip", "right_ear_base", "right_ear_tip",
+    "nose", "chin", "left_eye", "right_eye",
+    "throat", "withers",
+    "rear_left_knee", "rear_right_knee",
+)
+
+X, Y, CONF = 0, 1, 2
+
+
+class PoseLayout:
+    def __init__(self, landmarks):
+        self.landmarks = list(landmarks)
+        self.num_keypoints = len(self.landmarks)
+
+        index = {name: i for i, name in enumerate(self.landmarks)}
+        for name in REQUIRED_LANDMARKS:
+            if name not in index:
+                raise ValueError(f"Landmark '{name}' missing from model landmarks")
+            setattr(self, name, index[name])
+
+    # pose: (T, K, 2 or 3) array of x, y[, confidence] -> (T, 2) rear knee points.
+    # The more confident knee wins; ties and missing confidences fall back
+    # to the right knee.
+    def rear_knee(self, pose):
+        left = pose[:, self.rear_left_knee]
+        right = pose[:, self.rear_right_knee]
+        if pose.shape[2] <= CONF:
+            return right[:, :2]
+        use_left = left[:, CONF] > right[:, CONF]
+        return np.where(use_left[:, None], left[:, :2], right[:, :2])
+
+
+class PoseBuffer:
+    def __init__(self, num_keypoints, capacity=256):
+        self.num_keypoints = num_keypoints
+        self.size = 0
+        self.frame_ids = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.pose = np.full((capacity, num_keypoints, 3), np.nan, dtype=np.float32)
+
+    def append(self, frame_idx, timestamp, keypoints):
+        if self.size == len(self.frame_ids):
+            self._grow()
+
+        i = self.size
+        self.frame_ids[i] = frame_idx
+        self.timestamps[i] = timestamp
+        # Frames without a dog keep their NaN row
+        if keypoints is not None:
+            self.pose[i, :, :keypoints.shape[1]] = keypoints
+        self.size += 1
+
+    @property
+    def frames(self):
+        return self.frame_ids[:self.size]
+
+    @property
+    def times(self):
+        return self.timestamps[:self.size]
+
+    @property
+    def data(self):
+        return self.pose[:self.size]
+
+    def _grow(self):
+        capacity = max(1, len(self.frame_ids)) * 2
+        self.frame_ids = np.resize(self.frame_ids, capacity)
+        self.timestamps = np.resize(self.timestamps, capacity)
+        pose = np.full((capacity, self.num_keypoints, 3), np.nan, dtype=np.float32)
+        pose[:self.size] = self.pose[:self.size]
+        self.pose = pose
@@ -1,4 +1,14 @@
 import math
+import numpy as np
+
+DELTA_PARTS = [None, "Crouching (Fear/Submissive)", "Standing Tall (Confident)"]
+SPINE_PARTS = [None, "Stiff Posture (Aggressive/Alert)", "Relaxed Posture (Calm)"]
+
+# Every combination of the two parts, indexed by delta * 3 + spine
+POSTURE_LABELS = np.array([
+    " + ".join(p for p in (DELTA_PARTS[d], SPINE_PARTS[s]) if p) or "Unknown"
+    for d in range(3) for s in range(3)
+], dtype=object)
 
 def vector(p1, p2):
     return (p2[0] - p1[0], p2[1] - p1[1])
@@ -47,3 +57,27 @@ class PostureAnalysis:
 
     def reset(self):
         self.prev_withers_y = None
+
+    # ================= BATCH =================
+    # withers / rear_knee: (T, 2) arrays, NaN rows for frames without a dog.
+    # A NaN frame resets the withers history exactly like reset() does.
+    # "code" indexes POSTURE_LABELS.
+    @staticmethod
+    def analyze_batch(withers, rear_knee):
+        d = rear_knee - withers
+        spine_angle = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+
+        withers_delta = np.full(len(withers), np.nan)
+        withers_delta[1:] = withers[1:, 1] - withers[:-1, 1]
+
+        delta_code = np.where(withers_delta > 8, 1, np.where(withers_delta < -8, 2, 0))
+        spine_code = np.where(np.abs(spine_angle) > 50, 1, np.where(np.abs(spine_angle) < 20, 2, 0))
+
+        codes = (delta_code * 3 + spine_code).astype(np.uint8)
+        codes[np.isnan(spine_angle)] = 0
+
+        return {
+            "spine_angle": spine_angle,
+            "withers_delta": withers_delta,
+            "code": codes
+        }
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+import httpx
+
+# Statuses worth retrying: throttling, timeouts and transient upstream errors
+RETRY_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+_END = object()
+
+
+class ProviderError(Exception):
+    pass
+
+
+# =========================================================
+# EVENT LOOP
+# =========================================================
+class AsyncRunner:
+    # One event loop on a daemon thread carries every in-flight provider
+    # call; sync code (Flask handlers, analysis workers) just waits on it.
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="provider-loop", daemon=True)
+        self.thread.start()
+
+    # timeout is a deadline for the whole call, retries included. It is
+    # enforced on the loop, so the call itself is cancelled (releasing its
+    # connection and concurrency slot) and the waiting thread is freed.
+    def run(self, coro, timeout=None):
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        try:
+            return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+        except asyncio.TimeoutError:
+            raise ProviderError(f"provider call exceeded its {timeout}s deadline") from None
+
+    def iterate(self, agen, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put((True, item))
+                items.put((True, _END))
+            except Exception as e:
+                items.put((False, e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                try:
+                    ok, item = items.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise ProviderError(f"provider stream exceeded its {timeout}s deadline") from None
+                if not ok:
+                    raise item
+                if item is _END:
+                    return
+                yield item
+        finally:
+            # Stops the upstream stream if the consumer went away early
+            future.cancel()
+
+
+# =========================================================
+# BASE PROVIDER
+# =========================================================
+class Provider:
+    def __init__(self, name, base_url, headers=None, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=3, max_concurrency=8, backoff=0.5):
+        self.name = name
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+
+        # Created on first use inside the runner's loop
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def request(self, method, path, **kwargs):
+        client = self._ensure_client()
+
+        # The concurrency slot is held per attempt, never across a backoff
+        # wait, so a throttled call doesn't hold up healthy ones
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                try:
+                    response = await client.request(method, path, **kwargs)
+                except RETRY_ERRORS as e:
+                    error = ProviderError(f"{self.name}: {type(e).__name__}: {e}")
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        self._raise_for_status(response)
+                        return response
+                    error = ProviderError(f"{self.name} returned HTTP {response.status_code}")
+
+            await self._retry_wait(attempt, error)
+
+    async def stream_lines(self, method, path, **kwargs):
+        client = self._ensure_client()
+
+        for attempt in range(self.max_retries + 1):
+            started = False
+            async with self._semaphore:
+                try:
+                    async with client.stream(method, path, **kwargs) as response:
+                        if response.status_code in RETRY_STATUSES:
+                            error = ProviderError(f"{self.name} returned HTTP {response.status_code}")
+                        else:
+                            if response.is_error:
+                                await response.aread()
+                            self._raise_for_status(response)
+                            async for line in response.aiter_lines():
+                                started = True
+                                yield line
+                            return
+                except RETRY_ERRORS as e:
+                    # Only retry before anything reached the caller
+                    if started:
+                        raise ProviderError(f"{self.name}: stream interrupted: {e}") from e
+                    error = ProviderError(f"{self.name}: {type(e).__name__}: {e}")
+
+            await self._retry_wait(attempt, error)
+
+    async def _retry_wait(self, attempt, error):
+        if attempt >= self.max_retries:
+            raise error
+        delay = self.backoff * (2 ** attempt) * (1 + random.random())
+        print(f"🔁 {error} — retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+        await asyncio.sleep(delay)
+
+    def _raise_for_status(self, response):
+        if response.is_error:
+            raise ProviderError(f"{self.name} returned HTTP {response.status_code}: {response.text[:200]}")
+
+
+# =========================================================
+# PROVIDERS
+# =========================================================
+class LLMProvider(Provider):
+    # OpenAI-compatible chat completions (Novita)
+    def __init__(self, api_key, base_url, **kwargs):
+        super().__init__("llm", base_url, headers={"Authorization": f"Bearer {api_key}"}, **kwargs)
+
+    async def chat(self, model, messages, max_tokens, temperature):
+        response = await self.request("POST", "/chat/completions", json={
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        })
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def chat_stream(self, model, messages, max_tokens, temperature):
+        lines = self.stream_lines("POST", "/chat/completions", json={
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        })
+        async for line in lines:
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            token = choices[0].get("delta", {}).get("content") if choices else None
+            if token:
+                yield token
+
+
+class TTSProvider(Provider):
+    # ElevenLabs text-to-speech
+    def __init__(self, api_key, base_url, **kwargs):
+        super().__init__("tts", base_url, headers={"xi-api-key": api_key or ""}, **kwargs)
+
+    async def speak(self, text, voice_id, model_id, output_format, voice_settings):
+        response = await self.request(
+            "POST", f"/v1/text-to-speech/{voice_id}",
+            params={"output_format": output_format},
+            json={"text": text, "model_id": model_id, "voice_settings": voice_settings}
+        )
+        return response.content
+
+
+class SearchProvider(Provider):
+    # Tavily web search
+    def __init__(self, api_key, base_url, **kwargs):
+        super().__init__("search", base_url, headers={"Authorization": f"Bearer {api_key}"}, **kwargs)
+
+    async def search(self, query, search_depth="basic", max_results=5):
+        response = await self.request("POST", "/search", json={
+            "query": query,
+            "search_depth": search_depth,
+            "max_results": max_results
+        })
+        return response.json()
+
+
+# =========================================================
+# SHARED INSTANCES
+# =========================================================
+class Providers:
+    def __init__(self, llm, tts, search, runner):
+        self.llm = llm
+        self.tts = tts
+        self.search = search
+        self.runner = runner
+
+    def run(self, coro, timeout=None):
+        return self.runner.run(coro, timeout)
+
+    def iterate(self, agen, timeout=None):
+        return self.runner.iterate(agen, timeout)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+# A forked child inherits _shared but not its loop thread; calls on it would
+# never run. Let the child build its own on first use.
+def _reset_after_fork():
+    global _shared, _shared_lock
+    _shared = None
+    _shared_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Every analyzer in the process shares one loop and one connection pool per provider
+def get_providers(llm_key, tts_key, search_key, llm_base_url, tts_base_url, search_base_url,
+                  connect_timeout=5.0, read_timeout=60.0, max_retries=3,
+                  llm_concurrency=8, tts_concurrency=4, search_concurrency=8):
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            common = {"connect_timeout": connect_timeout, "read_timeout": read_timeout, "max_retries": max_retries}
+            _shared = Providers(
+                llm=LLMProvider(llm_key, llm_base_url, max_concurrency=llm_concurrency, **common),
+                tts=TTSProvider(tts_key, tts_base_url, max_concurrency=tts_concurrency, **common),
+                search=SearchProvider(search_key, search_base_url, max_concurrency=search_concurrency, **common),
+                runner=AsyncRunner()
+            )
+        return _shared
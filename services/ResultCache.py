@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import uuid
+import shutil
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3, ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # =========================================================
+    # LOOKUP
+    # =========================================================
+    def get(self, key):
+        entry_dir = os.path.join(self.cache_dir, key)
+        meta_path = os.path.join(entry_dir, "result.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        if time.time() - os.path.getmtime(meta_path) > self.ttl_seconds:
+            self._remove(entry_dir)
+            return None
+
+        try:
+            with open(meta_path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Touch for LRU eviction
+        os.utime(meta_path, None)
+        print(f"♻️ Result cache hit: {key}")
+        return self._from_stored(stored, entry_dir)
+
+    # =========================================================
+    # STORE
+    # =========================================================
+    # Moves a finished analysis folder into the cache and returns the
+    # result with its paths pointing at the cached files. The entry is
+    # assembled in a private temp folder and published with one rename; if
+    # another job stored the same key first, its entry wins and ours is
+    # dropped.
+    def put(self, key, output_dir, result):
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+
+        try:
+            os.replace(output_dir, tmp_dir)
+            stored = self._to_stored(result, os.path.join(output_dir, ""))
+            with open(os.path.join(tmp_dir, "result.json"), "w") as f:
+                json.dump(stored, f)
+
+            for attempt in range(2):
+                try:
+                    os.rename(tmp_dir, entry_dir)
+                    break
+                except OSError:
+                    # Entry already exists (ENOTEMPTY / EEXIST)
+                    cached = self.get(key)
+                    if cached is not None:
+                        self._remove(tmp_dir)
+                        return cached
+                    if attempt:
+                        raise
+                    # Expired or unreadable; replace it
+                    self._remove(entry_dir)
+        except BaseException:
+            self._remove(tmp_dir)
+            raise
+
+        self.evict(keep=entry_dir)
+        return self._from_stored(stored, entry_dir)
+
+    # =========================================================
+    # EVICTION
+    # =========================================================
+    def evict(self, keep=None):
+        now = time.time()
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("."):
+                # Entry still being stored by put()
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, "result.json")
+            try:
+                last_used = os.path.getmtime(meta_path)
+            except OSError:
+                # Not a finished entry (or another worker just evicted it)
+                continue
+
+            if now - last_used > self.ttl_seconds:
+                self._remove(entry_dir)
+                continue
+
+            size = self._dir_size(entry_dir)
+            entries.append((last_used, size, entry_dir))
+            total += size
+
+        # Least recently used first
+        for last_used, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            self._remove(entry_dir)
+            total -= size
+
+    # =========================================================
+    # HELPERS
+    # =========================================================
+    # Paths inside the entry are stored as "file:<relative path>" so the
+    # entry stays valid wherever the cache folder lives.
+    def _to_stored(self, value, output_dir):
+        if isinstance(value, dict):
+            return {k: self._to_stored(v, output_dir) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._to_stored(v, output_dir) for v in value]
+        if isinstance(value, str) and value.startswith(output_dir):
+            return "file:" + os.path.relpath(value, output_dir)
+        return value
+
+    def _from_stored(self, value, entry_dir):
+        if isinstance(value, dict):
+            return {k: self._from_stored(v, entry_dir) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._from_stored(v, entry_dir) for v in value]
+        if isinstance(value, str) and value.startswith("file:"):
+            return os.path.join(entry_dir, value[len("file:"):])
+        return value
+
+    def _dir_size(self, path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _remove(self, entry_dir):
+        shutil.rmtree(entry_dir, ignore_errors=True)
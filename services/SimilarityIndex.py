@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+
+
+class SimilarityIndex:
+    # Exact top-k nearest neighbours (Euclidean) over fixed-length vectors.
+    # Vectors live in one contiguous float32 matrix that grows by doubling,
+    # with their squared norms kept alongside, so a query is a single
+    # matrix-vector product plus an argpartition.
+    #
+    # `optional` is a slice of the vector that some vectors don't have (all
+    # zeros there). Distances with and without it aren't comparable, so a
+    # query only ranks vectors that have it exactly when the query has it.
+    def __init__(self, dim, capacity=1024, optional=None):
+        self.dim = dim
+        self.optional = optional
+        self.size = 0
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.norms = np.zeros(capacity, dtype=np.float32)
+        self.optional_norms = np.zeros(capacity, dtype=np.float32)
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.positions = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    # =========================================================
+    # BUILD
+    # =========================================================
+    def add(self, key, vector):
+        self.add_many([key], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self.lock:
+            for key, vector in zip(keys, vectors):
+                position = self.positions.get(key)
+                if position is None:
+                    self._reserve(self.size + 1)
+                    position = self.size
+                    self.size += 1
+                    self.positions[key] = position
+                    self.keys[position] = key
+
+                self.vectors[position] = vector
+                self.norms[position] = vector @ vector
+                if self.optional is not None:
+                    self.optional_norms[position] = vector[self.optional] @ vector[self.optional]
+
+    def _reserve(self, size):
+        capacity = len(self.vectors)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+
+        for name in ("vectors", "norms", "optional_norms", "keys"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def get(self, key):
+        with self.lock:
+            position = self.positions.get(key)
+            return None if position is None else self.vectors[position].copy()
+
+    # =========================================================
+    # QUERY
+    # =========================================================
+    # Returns [(key, distance)] nearest first; `exclude` keys are skipped
+    def query(self, vector, k=10, exclude=()):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self.lock:
+            size = self.size
+            distances = self.norms[:size] - 2 * (self.vectors[:size] @ vector) + vector @ vector
+            keys = self.keys[:size]
+            optional_norms = self.optional_norms[:size].copy()
+
+        if self.optional is not None:
+            has_optional = vector[self.optional] @ vector[self.optional] > 0
+            distances[(optional_norms > 0) != has_optional] = np.inf
+
+        for key in exclude:
+            position = self.positions.get(key)
+            if position is not None and position < size:
+                distances[position] = np.inf
+
+        k = min(k, size)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+
+        return [
+            (int(keys[i]), float(np.sqrt(max(distances[i], 0.0))))
+            for i in nearest if np.isfinite(distances[i])
+        ]
@@ -0,0 +1,59 @@
+import numpy as np
+
+from services.TailAnalysis import TAIL_LABELS
+from services.EarAnalysis import EAR_LABELS
+from services.HeadAnalysis import HEAD_LABELS
+from services.PostureAnalyzer import POSTURE_LABELS
+
+UNKNOWN = 0
+
+
+class StateVocabulary:
+    # Every state a component can be in, declared once. Frames store a
+    # small integer code; labels are only looked up for display.
+    # Code 0 is "unknown" (no dog in the frame), then each analyzer label
+    # once, in the analyzer's own code order.
+    def __init__(self, name, analyzer_labels):
+        labels = ["unknown"]
+        for label in analyzer_labels:
+            if label and label not in labels:
+                labels.append(label)
+
+        self.name = name
+        self.labels = np.array(labels, dtype=object)
+        self.dtype = np.uint8 if len(labels) <= 256 else np.uint16
+        self.codes = {label: code for code, label in enumerate(labels)}
+
+        # Analyzer code -> vocabulary code (the analyzers' packed codes can
+        # map several combinations to the same label, e.g. "Unknown")
+        self._from_analyzer = np.array(
+            [self.codes[label or "unknown"] for label in analyzer_labels], dtype=self.dtype
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    def from_analyzer(self, analyzer_codes, detected):
+        codes = self._from_analyzer[analyzer_codes]
+        codes[~detected] = UNKNOWN
+        return codes
+
+    def decode(self, codes):
+        return self.labels[np.asarray(codes, dtype=np.intp)]
+
+    def counts(self, codes):
+        return np.bincount(np.asarray(codes, dtype=np.intp), minlength=len(self))
+
+    # Ties go to the lowest code, so the result never depends on frame order
+    def most_common(self, codes):
+        if len(codes) == 0:
+            return "unknown"
+        return self.labels[int(np.argmax(self.counts(codes)))]
+
+
+STATE_VOCABULARY = {
+    "tail": StateVocabulary("tail", TAIL_LABELS),
+    "ears": StateVocabulary("ears", EAR_LABELS),
+    "head": StateVocabulary("head", HEAD_LABELS),
+    "posture": StateVocabulary("posture", POSTURE_LABELS)
+}
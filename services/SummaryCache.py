@@ -0,0 +1,67 @@
+import re
+import time
+import sqlite3
+import hashlib
+
+
+def normalize_profile(profile_text):
+    lines = [re.sub(r"\s+", " ", line).strip().lower() for line in profile_text.strip().splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+class SummaryCache:
+    def __init__(self, db_path="summary_cache.db", namespace=""):
+        self.db_path = db_path
+        # Anything that changes the answer for the same profile (LLM model,
+        # prompt version) goes in the namespace
+        self.namespace = namespace
+
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS doctor_summaries (
+                    profile_key TEXT PRIMARY KEY,
+                    profile TEXT,
+                    summary TEXT,
+                    created REAL
+                )
+            ''')
+        conn.close()
+
+    def key(self, profile_text):
+        text = f"{self.namespace}\n{normalize_profile(profile_text)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, profile_text):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT summary FROM doctor_summaries WHERE profile_key = ?',
+                (self.key(profile_text),)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def put(self, profile_text, summary):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO doctor_summaries (profile_key, profile, summary, created)
+                    VALUES (?, ?, ?, ?)
+                ''', (self.key(profile_text), normalize_profile(profile_text), summary, time.time()))
+        finally:
+            conn.close()
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM doctor_summaries').fetchone()[0]
+        finally:
+            conn.close()
+
+    # Short-lived connections keep the cache safe to share between worker
+    # threads and processes
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
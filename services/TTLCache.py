@@ -0,0 +1,178 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_question(text):
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class SharedStream:
+    # Items produced once and replayed to every subscriber; late subscribers
+    # first get what they missed, then wait for the rest.
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def push(self, item):
+        with self.cond:
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def close(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.items) and not self.done:
+                    self.cond.wait()
+                if i < len(self.items):
+                    item = self.items[i]
+                    i += 1
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield item
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds=3600, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.entries = OrderedDict()   # key -> (expires_at, value), oldest first
+        self.inflight = {}             # key -> Future of the call computing it
+        self.streams = {}              # key -> SharedStream of the producer computing it
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        with self.lock:
+            found, value = self._get(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found, value
+
+    def put(self, key, value):
+        with self.lock:
+            self._put(key, value)
+
+    # Returns the cached value, or computes it once no matter how many
+    # threads ask for the same key at the same time. Exceptions are passed
+    # to every waiter and are never cached.
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            found, value = self._get(key)
+            if found:
+                self.hits += 1
+                return value
+
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                self.inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self._put(key, value)
+            del self.inflight[key]
+        future.set_result(value)
+        return value
+
+    # Streaming get_or_compute. Returns (True, value) on a hit, otherwise
+    # (False, SharedStream). The first caller starts produce() on its own
+    # thread, so it keeps going if that caller goes away; identical keys
+    # meanwhile subscribe to the same stream. finish(items) is the value cached.
+    def stream(self, key, produce, finish):
+        with self.lock:
+            found, value = self._get(key)
+            if found:
+                self.hits += 1
+                return True, value
+
+            stream = self.streams.get(key)
+            owner = stream is None
+            if owner:
+                self.misses += 1
+                stream = SharedStream()
+                self.streams[key] = stream
+            else:
+                self.coalesced += 1
+
+        if owner:
+            threading.Thread(target=self._produce, args=(key, stream, produce, finish), daemon=True).start()
+        return False, stream
+
+    def _produce(self, key, stream, produce, finish):
+        try:
+            for item in produce():
+                stream.push(item)
+            value = finish(stream.items)
+        except Exception as e:
+            with self.lock:
+                del self.streams[key]
+            stream.close(e)
+            return
+
+        with self.lock:
+            self._put(key, value)
+            del self.streams[key]
+        stream.close()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self.entries)
+            }
+
+    # =========================================================
+    # HELPERS (lock held)
+    # =========================================================
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return False, None
+        self.entries.move_to_end(key)
+        return True, entry[1]
+
+    def _put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -1,4 +1,7 @@
 import math
+import numpy as np
+
+TAIL_LABELS = np.array(["", "First frame", "Still", "Moving slightly", "Wagging"], dtype=object)
 
 class TailAnalysis:
     def __init__(self):
@@ -44,6 +47,31 @@ class TailAnalysis:
     def reset(self):
         self.previous_angle = None   
 
+    # ================= BATCH =================
+    # tail_start / tail_end: (T, 2) arrays, NaN rows for frames without a dog.
+    # A NaN frame resets the angle history exactly like reset() does.
+    # Returns codes into TAIL_LABELS, angles and intensity.
+    @staticmethod
+    def tail_movement_batch(tail_start, tail_end):
+        d = tail_end - tail_start
+        angles = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+
+        prev = np.full_like(angles, np.nan)
+        prev[1:] = angles[:-1]
+        intensity = np.abs(angles - prev)
+
+        valid = ~np.isnan(angles)
+        has_prev = valid & ~np.isnan(prev)
+
+        codes = np.zeros(len(angles), dtype=np.uint8)
+        codes[valid] = 1
+        codes[has_prev] = 2
+        codes[has_prev & (intensity > 5)] = 3
+        codes[has_prev & (intensity > 20)] = 4
+
+        intensity[~has_prev] = np.nan
+        return codes, angles, intensity
+
     # ================= NEW METHOD =================
     def get_clean_data(self):
         clean_frames = []
@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+class TaskGraph:
+    def __init__(self, executor=None, max_workers=4):
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self.nodes = {}
+
+    # fn receives the results of its dependencies as keyword arguments
+    def add(self, name, fn, deps=(), timeout=None):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Unknown dependency '{dep}' for task '{name}'")
+        self.nodes[name] = {"fn": fn, "deps": tuple(deps), "timeout": timeout}
+        return self
+
+    # =========================================================
+    # RUN
+    # =========================================================
+    def run(self):
+        start = time.perf_counter()
+        results, errors, timings = {}, {}, {}
+        running = {}
+        pending = dict(self.nodes)
+
+        while pending or running:
+            # -------- start every task whose dependencies are done --------
+            for name in list(pending):
+                node = pending[name]
+                failed = [dep for dep in node["deps"] if dep in errors]
+                if failed:
+                    errors[name] = RuntimeError(f"skipped, dependency '{failed[0]}' failed")
+                    del pending[name]
+                    continue
+                if all(dep in results for dep in node["deps"]):
+                    kwargs = {dep: results[dep] for dep in node["deps"]}
+                    timings[name] = {"start": time.perf_counter() - start}
+                    running[name] = self.executor.submit(node["fn"], **kwargs)
+                    del pending[name]
+
+            if not running:
+                continue
+
+            # -------- wait for the next finish or the nearest deadline --------
+            now = time.perf_counter() - start
+            deadlines = [
+                timings[name]["start"] + self.nodes[name]["timeout"] - now
+                for name in running if self.nodes[name]["timeout"] is not None
+            ]
+            done, _ = wait(
+                list(running.values()),
+                timeout=max(0.0, min(deadlines)) if deadlines else None,
+                return_when=FIRST_COMPLETED
+            )
+
+            now = time.perf_counter() - start
+            for name, future in list(running.items()):
+                timeout = self.nodes[name]["timeout"]
+                if future in done:
+                    timings[name]["end"] = now
+                    error = future.exception()
+                    if error is None:
+                        results[name] = future.result()
+                    else:
+                        errors[name] = error
+                    del running[name]
+                elif timeout is not None and now - timings[name]["start"] >= timeout:
+                    # The thread can't be killed; its late result is ignored
+                    future.cancel()
+                    timings[name]["end"] = now
+                    errors[name] = TaskTimeout(f"task '{name}' exceeded {timeout}s")
+                    del running[name]
+
+        for timing in timings.values():
+            timing["duration"] = timing["end"] - timing["start"]
+
+        return {
+            "results": results,
+            "errors": errors,
+            "timings": timings,
+            "critical_path": self._critical_path(timings),
+            "total_seconds": time.perf_counter() - start
+        }
+
+    # =========================================================
+    # HELPERS
+    # =========================================================
+    # Walks back from the task that finished last through the dependency
+    # that finished last, i.e. the chain that set the stage's wall time.
+    def _critical_path(self, timings):
+        if not timings:
+            return []
+
+        name = max(timings, key=lambda n: timings[n]["end"])
+        path = [name]
+        while True:
+            deps = [dep for dep in self.nodes[name]["deps"] if dep in timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: timings[n]["end"])
+            path.append(name)
+        return list(reversed(path))
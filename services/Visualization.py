@@ -1,60 +1,55 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+# Object-oriented Agg figures: each plot owns its figure, so these are safe
+# to call from any thread (pyplot's global state is not).
+def _new_figure(figsize=None):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _line_plot(frame_ids, values, ylabel, title, path):
+    fig, ax = _new_figure()
+    ax.plot(frame_ids, values)
+    ax.set_xlabel("Frame")
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    fig.savefig(path)
+    print(f"Saved {path}")
+
 
 class Visualization:
 
     @staticmethod
     def plot_tail_angle(frame_ids, tail_angles):
-        plt.figure()
-        plt.plot(frame_ids, tail_angles)
-        plt.xlabel("Frame")
-        plt.ylabel("Tail Angle (deg)")
-        plt.title("Tail Angle vs Frame")
-        plt.savefig("tail_angle_vs_frame.png")
-        plt.close()
-        print("Saved tail_angle_vs_frame.png")
+        _line_plot(frame_ids, tail_angles, "Tail Angle (deg)", "Tail Angle vs Frame",
+                   "tail_angle_vs_frame.png")
 
     @staticmethod
     def plot_tail_intensity(frame_ids, tail_intensity):
-        plt.figure()
-        plt.plot(frame_ids, tail_intensity)
-        plt.xlabel("Frame")
-        plt.ylabel("Tail Intensity")
-        plt.title("Tail Intensity vs Frame")
-        plt.savefig("tail_intensity_vs_frame.png")
-        plt.close()
-        print("Saved tail_intensity_vs_frame.png")
+        _line_plot(frame_ids, tail_intensity, "Tail Intensity", "Tail Intensity vs Frame",
+                   "tail_intensity_vs_frame.png")
 
     @staticmethod
     def plot_head_up_down(frame_ids, head_up_down_angles):
-        plt.figure()
-        plt.plot(frame_ids, head_up_down_angles)
-        plt.xlabel("Frame")
-        plt.ylabel("Head Up/Down Angle")
-        plt.title("Head Up/Down vs Frame")
-        plt.savefig("head_up_down_vs_frame.png")
-        plt.close()
-        print("Saved head_up_down_vs_frame.png")
+        _line_plot(frame_ids, head_up_down_angles, "Head Up/Down Angle", "Head Up/Down vs Frame",
+                   "head_up_down_vs_frame.png")
 
     @staticmethod
     def plot_posture_delta(frame_ids, withers_deltas):
-        plt.figure()
-        plt.plot(frame_ids, withers_deltas)
-        plt.xlabel("Frame")
-        plt.ylabel("Withers Delta")
-        plt.title("Posture (Withers Movement) vs Frame")
-        plt.savefig("posture_withers_delta_vs_frame.png")
-        plt.close()
-        print("Saved posture_withers_delta_vs_frame.png")
+        _line_plot(frame_ids, withers_deltas, "Withers Delta", "Posture (Withers Movement) vs Frame",
+                   "posture_withers_delta_vs_frame.png")
 
     @staticmethod
     def plot_emotion_timeline(frame_ids, emotions):
-        plt.figure(figsize=(12, 4))
-        plt.plot(frame_ids, range(len(frame_ids)))  # dummy y
+        fig, ax = _new_figure(figsize=(12, 4))
+        ax.plot(frame_ids, range(len(frame_ids)))  # dummy y
         for i, emo in enumerate(emotions):
-            plt.text(frame_ids[i], 0, emo, rotation=45, fontsize=8)
-        plt.yticks([])
-        plt.xlabel("Frame")
-        plt.title("Emotion Timeline")
-        plt.savefig("emotion_timeline.png")
-        plt.close()
+            ax.text(frame_ids[i], 0, emo, rotation=45, fontsize=8)
+        ax.set_yticks([])
+        ax.set_xlabel("Frame")
+        ax.set_title("Emotion Timeline")
+        fig.savefig("emotion_timeline.png")
         print("Saved emotion_timeline.png")
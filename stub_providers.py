@@ -0,0 +1,92 @@
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===================== CLI =====================
+# Local stand-in for the LLM (OpenAI-compatible), TTS (ElevenLabs) and
+# search (Tavily) APIs, for tests and load runs without real keys:
+#   python stub_providers.py --port 8765 [--delay 0.2] [--fail-rate 0.1]
+#   LLM_BASE_URL=http://127.0.0.1:8765/openai \
+#   TTS_BASE_URL=http://127.0.0.1:8765 \
+#   SEARCH_BASE_URL=http://127.0.0.1:8765 python app.py
+STUB_ANSWER = "As an AI vet, your dog looks calm and healthy; keep up daily walks and regular check-ups."
+STUB_AUDIO = b"ID3" + b"\x00" * 1024
+STUB_RESULTS = [
+    {"title": "Why dogs tilt their heads", "content": "Head tilting usually helps dogs locate sounds and read faces."},
+    {"title": "Reading dog body language", "content": "Ears, tail and posture together show how a dog feels."}
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    fail_rate = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._send(503, b'{"error": "stub failure"}', "application/json")
+
+        path = self.path.split("?", 1)[0]
+        if path.endswith("/chat/completions"):
+            return self._chat(body)
+        if path.startswith("/v1/text-to-speech/"):
+            return self._send(200, STUB_AUDIO, "audio/mpeg")
+        if path == "/search":
+            results = STUB_RESULTS[:body.get("max_results", 5)]
+            return self._send(200, json.dumps({"query": body.get("query"), "results": results}).encode(), "application/json")
+
+        self._send(404, b'{"error": "not found"}', "application/json")
+
+    def _chat(self, body):
+        if not body.get("stream"):
+            response = {"choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_ANSWER}}]}
+            return self._send(200, json.dumps(response).encode(), "application/json")
+
+        # Server-sent events, one word per chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in STUB_ANSWER.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.delay / 10)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _send(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, delay=0.0, fail_rate=0.0):
+    StubHandler.delay = delay
+    StubHandler.fail_rate = fail_rate
+    return ThreadingHTTPServer((host, port), StubHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub LLM / TTS / search providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.delay, args.fail_rate)
+    print(f"🧪 Stub providers listening on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from utils.settings import landmarks
+from services.BatchAnalysis import BatchAnalysis
+from services.TailAnalysis import TailAnalysis
+from services.EarAnalysis import EarAnalysis
+from services.HeadAnalysis import HeadAnalysis
+from services.PostureAnalyzer import PostureAnalysis
+from services.StateVocabulary import STATE_VOCABULARY
+
+COMPONENTS = ("tail", "ears", "head", "posture")
+
+
+def map_keypoints(keypoints):
+    # Same as the per-frame pipeline: int pixel points by landmark name, the
+    # rear knee being whichever of the two comes last
+    points = {name: (int(x), int(y)) for name, (x, y) in zip(landmarks, keypoints)}
+    points["rear_knee"] = points["rear_right_knee"]
+    return points
+
+
+def per_frame_labels(pose, detected):
+    tail, ears, head, posture = TailAnalysis(), EarAnalysis(), HeadAnalysis(), PostureAnalysis()
+    labels = []
+    for keypoints, has_dog in zip(pose, detected):
+        if not has_dog:
+            tail.reset()
+            posture.reset()
+            labels.append(("unknown",) * 4)
+            continue
+
+        p = map_keypoints(keypoints)
+        tail_status, _, _ = tail.tail_movement(p["tail_start"], p["tail_end"])
+        labels.append((
+            tail_status,
+            ears.analyze(p["left_ear_base"], p["left_ear_tip"], p["right_ear_base"], p["right_ear_tip"])["state"],
+            head.analyze(p["nose"], p["chin"], p["left_eye"], p["right_eye"], p["throat"], p["withers"])["state"],
+            posture.analyze(p["withers"], p["rear_knee"])["state"]
+        ))
+    return labels
+
+
+def test_batch_matches_per_frame_analyzers():
+    rng = np.random.default_rng(0)
+    analyzer = BatchAnalysis(landmarks)
+
+    for _ in range(300):
+        frames = int(rng.integers(1, 40))
+        pose = rng.uniform(0, 60, (frames, len(landmarks), 2))
+        # Coincident points hit the analyzers' threshold and zero-angle cases
+        pose[rng.random((frames, len(landmarks))) < 0.05] = 0
+        detected = rng.random(frames) >= 0.2
+        pose[~detected] = np.nan
+
+        result = analyzer.analyze(pose)
+
+        assert result["detected"].tolist() == detected.tolist()
+        got = list(zip(*(STATE_VOCABULARY[key].decode(result[key]).tolist() for key in COMPONENTS)))
+        expected = [
+            tuple(label or "unknown" for label in frame)
+            for frame in per_frame_labels(np.nan_to_num(pose), detected)
+        ]
+        assert got == expected
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from services.EmotionTrends import EmotionTrends
+
+
+def sessions(values, start_day=0.0):
+    return [(start_day + i, {"mental_health": float(v)}) for i, v in enumerate(values)]
+
+
+def changes(trends, values):
+    return [trend["mental_health"]["change"] for trend, _ in trends.replay(sessions(values), 0)]
+
+
+def test_rejects_baseline_shorter_than_two_sessions():
+    with pytest.raises(ValueError):
+        EmotionTrends(min_sessions=1)
+
+
+def test_stable_series_raises_no_change():
+    rng = np.random.default_rng(1)
+    values = 70 + rng.normal(0, 3, 60)
+    assert set(changes(EmotionTrends(), values)) == {None}
+
+
+def test_level_shift_is_flagged_in_its_direction():
+    rng = np.random.default_rng(1)
+    baseline = 70 + rng.normal(0, 3, 30)
+
+    down = changes(EmotionTrends(), np.concatenate([baseline, 50 + rng.normal(0, 3, 10)]))
+    assert set(down[:30]) == {None}
+    # Flagged within a few sessions of the shift, and only once: the
+    # baseline then starts over at the new level
+    assert down[30:35].count("down") == 1
+    assert "up" not in down
+
+    up = changes(EmotionTrends(), np.concatenate([baseline, 90 + rng.normal(0, 3, 10)]))
+    assert up[30:35].count("up") == 1
+    assert "down" not in up
+
+
+def test_no_change_before_min_sessions():
+    values = [70, 71, 69, 70, 10, 10, 10]
+    assert set(changes(EmotionTrends(min_sessions=10), values)) == {None}
+
+
+def test_incremental_replay_matches_full_replay():
+    rng = np.random.default_rng(2)
+    trends = EmotionTrends()
+    rows = sessions(70 + rng.normal(0, 5, 60), start_day=19000.0)
+    full = trends.replay(rows, 0)
+
+    state = None
+    for i in range(len(rows)):
+        # As when saving: only the longest window is passed as context
+        first = next(j for j, (day, _) in enumerate(rows) if day > rows[i][0] - trends.longest)
+        (trend, state), = trends.replay(rows[first:i + 1], i - first, state)
+        assert trend == full[i][0]
+        assert state == full[i][1]
+
+
+def test_window_means_and_slope():
+    trends = EmotionTrends(windows_days=(7, 30))
+    rows = sessions(range(40))
+    trend, _ = trends.replay(rows, 0)[-1]
+
+    # Sessions in (day - window, day]
+    assert trend["mental_health"]["mean_7d"] == np.mean(range(33, 40))
+    assert trend["mental_health"]["mean_30d"] == np.mean(range(10, 40))
+    assert trend["mental_health"]["slope_30d"] == 1.0
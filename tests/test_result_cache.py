@@ -0,0 +1,88 @@
+import os
+import json
+import time
+
+from services.ResultCache import ResultCache
+
+
+def finished_analysis(root, name, text="{}"):
+    output_dir = os.path.join(root, name)
+    os.makedirs(output_dir)
+    timeline = os.path.join(output_dir, "timeline.json")
+    with open(timeline, "w") as f:
+        f.write(text)
+    return output_dir, {
+        "timeline": timeline,
+        "doctor_summary": "As an AI vet, your dog is happy",
+        "emotional_report": {"happy_percent": 40.0},
+        "fingerprint": [0.5, 0.25]
+    }
+
+
+def test_put_then_get_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    output_dir, result = finished_analysis(str(tmp_path), "job1", '{"count": 3}')
+
+    stored = cache.put("key", output_dir, result)
+    entry_dir = str(tmp_path / "cache" / "key")
+
+    # The job folder moved into the cache; paths point into the entry
+    assert not os.path.exists(output_dir)
+    assert stored["timeline"] == os.path.join(entry_dir, "timeline.json")
+    with open(stored["timeline"]) as f:
+        assert json.load(f) == {"count": 3}
+
+    # Everything else comes back unchanged, also from a fresh instance
+    assert ResultCache(str(tmp_path / "cache")).get("key") == stored
+    assert stored["doctor_summary"] == result["doctor_summary"]
+    assert stored["emotional_report"] == result["emotional_report"]
+    assert stored["fingerprint"] == result["fingerprint"]
+
+
+def test_miss(tmp_path):
+    assert ResultCache(str(tmp_path)).get("missing") is None
+
+
+def test_second_put_of_a_key_returns_the_stored_entry(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    first_dir, first = finished_analysis(str(tmp_path), "job1", '"first"')
+    second_dir, second = finished_analysis(str(tmp_path), "job2", '"second"')
+
+    stored = cache.put("key", first_dir, first)
+    again = cache.put("key", second_dir, second)
+
+    assert again == stored
+    with open(again["timeline"]) as f:
+        assert json.load(f) == "first"
+    # The losing copy is dropped, no temp folders are left behind
+    assert not os.path.exists(second_dir)
+    assert os.listdir(str(tmp_path / "cache")) == ["key"]
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), ttl_seconds=60)
+    output_dir, result = finished_analysis(str(tmp_path), "job1")
+    cache.put("key", output_dir, result)
+
+    old = time.time() - 120
+    os.utime(str(tmp_path / "cache" / "key" / "result.json"), (old, old))
+
+    assert cache.get("key") is None
+    assert not os.path.exists(str(tmp_path / "cache" / "key"))
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=3500)
+    # Room for three entries of ~1.2 kB each
+    for i, key in enumerate(("a", "b", "c")):
+        output_dir, result = finished_analysis(str(tmp_path), f"job{i}", "x" * 1000)
+        cache.put(key, output_dir, result)
+        # Distinct last-used times, "a" oldest
+        stamp = time.time() - 100 + i
+        os.utime(str(tmp_path / "cache" / key / "result.json"), (stamp, stamp))
+
+    cache.get("a")
+    output_dir, result = finished_analysis(str(tmp_path), "job3", "x" * 1000)
+    cache.put("d", output_dir, result)
+
+    assert sorted(os.listdir(str(tmp_path / "cache"))) == ["a", "c", "d"]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from services.SimilarityIndex import SimilarityIndex
+
+
+def test_query_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.random((300, 16)).astype(np.float32)
+    index = SimilarityIndex(16, capacity=4)
+    index.add_many(range(100, 400), vectors)
+
+    query = vectors[7]
+    result = index.query(query, k=10, exclude=[107])
+
+    distances = np.linalg.norm(vectors - query, axis=1)
+    distances[7] = np.inf
+    expected = np.argsort(distances)[:10]
+    assert [key for key, _ in result] == [int(i) + 100 for i in expected]
+    assert np.allclose([d for _, d in result], distances[expected], atol=1e-4)
+
+
+def test_add_replaces_an_existing_key():
+    index = SimilarityIndex(2)
+    index.add(1, [0.0, 0.0])
+    index.add(1, [3.0, 4.0])
+
+    assert len(index) == 1
+    assert index.query([0.0, 0.0], k=1) == [(1, 5.0)]
+
+
+def test_optional_block_only_compares_like_with_like():
+    index = SimilarityIndex(3, optional=slice(2, 3))
+    index.add(1, [0.0, 0.0, 0.0])   # without the block
+    index.add(2, [0.1, 0.0, 0.5])   # with it
+    index.add(3, [5.0, 0.0, 0.0])
+
+    assert [key for key, _ in index.query([0.0, 0.0, 0.0], k=3)] == [1, 3]
+    assert [key for key, _ in index.query([0.0, 0.0, 0.4], k=3)] == [2]
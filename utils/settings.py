@@ -1,4 +1,3 @@
-from ultralytics import YOLO
 landmarks=  ["front_left_paw","front_left_knee"
     ,"front_left_elbow"
     ,"rear_left_paw"
@@ -24,5 +23,74 @@ landmarks=  ["front_left_paw","front_left_knee"
     ,"throat"]
 
 device = "cpu"
-model = YOLO("best.pt") 
+model_weights = "best.pt"   # every analyzer loads its own YOLO from this file
 
+
+# ===== ANALYSIS JOBS =====
+analysis_workers = 2
+analysis_worker_mode = "thread"   # "thread" or "process"
+max_pending_jobs = 32
+
+# ===== FRAME SAMPLING =====
+sampling_mode = "fps"   # "fps", "stride", "count" or "first"
+sample_fps = 2.0        # "fps": frames analyzed per second of video
+frame_stride = 15       # "stride": analyze every Nth frame
+sample_count = 300      # "count": N frames spread evenly across the clip
+max_frames = 600        # hard cap on analyzed frames per video
+
+# ===== POSE INFERENCE =====
+inference_batch_size = 8   # frames per model.predict call
+inference_imgsz = 640      # network input size
+
+# ===== GRAPHS =====
+render_graph_pngs = False   # result page draws charts from timeline.json; True also exports a PNG per analysis
+graph_render_workers = 1    # separate processes rendering PNG exports
+
+# ===== EMOTIONAL SCORING =====
+# mental_health_percent = sum(percent of frames * weight), clamped to 0..100
+emotion_weights = {"happy": 1.0, "neutral": 0.6, "sad": -0.8, "environment_stress": -0.7}
+worry_thresholds = {"sad": 40, "environment_stress": 35}   # percent of frames
+live_score_every_frames = 32      # live scores on /jobs/<id> while a video is processed (thread workers)
+live_score_window_seconds = 10.0  # sliding window next to the cumulative scores
+
+# ===== HISTORY DATABASE =====
+database_path = "dog_health.db"   # every finished analysis, per dog
+database_pool_size = 4            # pooled read connections (writes go through one writer thread)
+database_busy_timeout = 5.0       # seconds to wait on a locked database before failing
+history_page_size = 20            # rows per /history page unless ?limit= is given
+history_max_page_size = 100       # upper bound for ?limit=
+
+# ===== TRENDS =====
+trend_windows_days = (7, 30)      # rolling means per window; slope over the longest
+trend_change_threshold = 6.0      # CUSUM alarm level, in baseline standard deviations
+trend_change_drift = 0.5          # per-session shifts below this (in SDs) don't accumulate
+trend_min_sessions = 10           # sessions of baseline before changes are flagged (>= 2)
+trend_max_points = 365            # sessions per /trend response
+
+# ===== SIMILAR SESSIONS =====
+similar_max_results = 50          # upper bound for ?k= on /history/videos/<id>/similar
+
+# ===== KEYPOINT CACHE =====
+keypoint_cache_dir = "keypoint_cache"   # raw per-frame keypoints, keyed by video + weights hash
+
+# ===== RESULT CACHE =====
+result_cache_max_mb = 2048       # finished analyses kept under results/cache
+result_cache_ttl_hours = 7 * 24
+
+# ===== DOCTOR SUMMARY CACHE =====
+summary_cache_path = "summary_cache.db"   # LLM doctor lines keyed by behavior profile
+
+# ===== TTS AUDIO CACHE =====
+tts_cache_dir = "tts_cache"   # synthesized doctor lines, keyed by text + voice settings
+tts_cache_max_mb = 512
+
+# ===== CHATBOT CACHE =====
+chatbot_cache_ttl_minutes = 60   # search results and answers per normalized question
+
+# ===== PROVIDERS (LLM / TTS / SEARCH) =====
+provider_connect_timeout = 5    # seconds
+provider_read_timeout = 60      # seconds
+provider_max_retries = 3        # with exponential backoff on 429/5xx/connection errors
+llm_max_concurrency = 8         # in-flight requests per provider
+tts_max_concurrency = 4
+search_max_concurrency = 8